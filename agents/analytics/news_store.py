@@ -0,0 +1,265 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+from typing import List, Dict
+import numpy as np
+from agents.analytics.sentiment import analyze_sentiment_finbert
+from agents.retriever.embedder import encode_texts, embedding_model_id
+from utils.scheduler import scheduler
+
+NEWS_STORE_PATH = Path(os.getenv("NEWS_STORE_PATH", "data/news_store.sqlite"))
+NEWS_REFRESH_TTL = float(os.getenv("NEWS_REFRESH_TTL", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    summary TEXT,
+    description TEXT,
+    published_at INTEGER,
+    sentiment TEXT,
+    embedding BLOB,
+    embedding_model TEXT,
+    ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS ticker_articles (
+    ticker TEXT,
+    url TEXT,
+    published_at INTEGER,
+    PRIMARY KEY (ticker, url)
+);
+CREATE INDEX IF NOT EXISTS idx_ticker_published ON ticker_articles (ticker, published_at DESC);
+CREATE TABLE IF NOT EXISTS feeds (
+    ticker TEXT PRIMARY KEY,
+    refreshed_at REAL
+);
+"""
+
+def canonical_url(url: str) -> str:
+    """
+    Normalises an article URL so syndicated copies and tracking variants share one key
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, "", ""))
+
+def article_text(article: dict) -> str:
+    title = article.get("Title", "")
+    summary = article.get("Summary", "")
+    description = article.get("Description", "")
+    return f"{title}. {summary} {description}".strip()
+
+def _timestamp(published: str) -> int | None:
+    # Undated articles are stored as NULL, which sorts after every dated one
+    try:
+        return int(datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp())
+    except (ValueError, AttributeError):
+        return None
+
+class NewsStore:
+    """
+    Local article store keyed by canonical URL. Sentiment and embeddings are computed
+    once when an article is first ingested; reads come from the (ticker, published_at)
+    index. Embeddings are tagged with the model that produced them and recomputed
+    when the configured model or backend changes.
+
+    Methods are blocking sqlite3 calls; async callers run them with asyncio.to_thread.
+    """
+    def __init__(self, path: Path = NEWS_STORE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(articles)")}
+        if "embedding_model" not in columns:
+            # Stores created before embeddings were tagged; their vectors count as stale
+            self.conn.execute("ALTER TABLE articles ADD COLUMN embedding_model TEXT")
+        self._lock = threading.Lock()
+
+    def needs_refresh(self, ticker: str) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT refreshed_at FROM feeds WHERE ticker = ?", (ticker,)).fetchone()
+        return row is None or time.time() - row[0] >= NEWS_REFRESH_TTL
+
+    def mark_refreshed(self, ticker: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feeds (ticker, refreshed_at) VALUES (?, ?)", (ticker, time.time())
+            )
+
+    def unscored(self, urls: list) -> set:
+        """
+        URLs that are not stored yet or whose sentiment failed last time
+        """
+        if not urls:
+            return set()
+        placeholders = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT url FROM articles WHERE url IN ({placeholders}) AND sentiment IS NOT NULL", urls
+            ).fetchall()
+        return set(urls) - {row[0] for row in rows}
+
+    def unembedded(self, urls: list, model: str) -> set:
+        """
+        URLs that are not stored yet or whose embedding came from another model
+        """
+        if not urls:
+            return set()
+        placeholders = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT url FROM articles WHERE url IN ({placeholders}) AND embedding IS NOT NULL "
+                "AND embedding_model = ?", [*urls, model]
+            ).fetchall()
+        return set(urls) - {row[0] for row in rows}
+
+    def upsert(self, articles: List[Dict], sentiments: dict, embeddings: dict, model: str):
+        """
+        Inserts articles or updates them with whatever was recomputed: sentiments and
+        embeddings map URL -> value and only hold the articles that needed them
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            for article in articles:
+                url = article["URL"]
+                embedding = embeddings.get(url)
+                self.conn.execute(
+                    """
+                    INSERT INTO articles
+                        (url, title, summary, description, published_at, sentiment, embedding, embedding_model, ingested_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        sentiment = COALESCE(excluded.sentiment, articles.sentiment),
+                        embedding = COALESCE(excluded.embedding, articles.embedding),
+                        embedding_model = COALESCE(excluded.embedding_model, articles.embedding_model)
+                    """,
+                    (
+                        url, article.get("Title", ""), article.get("Summary", ""),
+                        article.get("Description", ""), _timestamp(article.get("Published", "")),
+                        sentiments.get(url),
+                        np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None,
+                        model if embedding is not None else None,
+                        now
+                    )
+                )
+
+    def link(self, ticker: str, articles: List[Dict]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO ticker_articles (ticker, url, published_at) VALUES (?, ?, ?)",
+                [(ticker, a["URL"], _timestamp(a.get("Published", ""))) for a in articles]
+            )
+
+    def latest(self, ticker: str, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT a.url, a.title, a.summary, a.description, a.published_at, a.sentiment
+                FROM ticker_articles t JOIN articles a ON a.url = t.url
+                WHERE t.ticker = ?
+                ORDER BY t.published_at DESC
+                LIMIT ?
+                """,
+                (ticker, limit)
+            ).fetchall()
+
+        return [{
+            "Title": title,
+            "Summary": summary,
+            "Description": description,
+            "URL": url,
+            "Published": datetime.fromtimestamp(published_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                         if published_at is not None else "",
+            "Sentiment": sentiment or "UNKNOWN",
+        } for url, title, summary, description, published_at, sentiment in rows]
+
+    def embeddings(self, urls: list, model: str) -> dict:
+        """
+        Stored embeddings by canonical URL, only those produced by the given model
+        """
+        if not urls:
+            return {}
+        placeholders = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT url, embedding FROM articles WHERE url IN ({placeholders}) AND embedding IS NOT NULL "
+                "AND embedding_model = ?", [*urls, model]
+            ).fetchall()
+        return {url: np.frombuffer(blob, dtype=np.float32) for url, blob in rows}
+
+    async def ingest(self, ticker: str, articles: List[Dict], limit: int = 10):
+        """
+        Stores the newest `limit` articles, scoring and embedding only those not seen
+        before; older ones would never be returned by latest() anyway
+        """
+        articles = [{**a, "URL": canonical_url(a["URL"])} for a in articles if a.get("URL")]
+        articles = list({a["URL"]: a for a in articles}.values())
+        articles.sort(key=lambda a: _timestamp(a.get("Published", "")) or 0, reverse=True)
+        articles = articles[:limit]
+        if not articles:
+            return
+
+        urls = [a["URL"] for a in articles]
+        model = embedding_model_id()
+        to_score, to_embed = await asyncio.gather(
+            asyncio.to_thread(self.unscored, urls),
+            asyncio.to_thread(self.unembedded, urls, model)
+        )
+        score = [a for a in articles if a["URL"] in to_score]
+        embed = [a for a in articles if a["URL"] in to_embed]
+
+        async def no_vectors():
+            return []
+
+        if score or embed:
+            # Every job runs to completion: one shed or failed job must not discard
+            # the others' results or leave them running unowned
+            *scores, vectors = await asyncio.gather(
+                *(scheduler.run("sentiment", analyze_sentiment_finbert, article_text(a)) for a in score),
+                scheduler.run("embed", encode_texts, [article_text(a) for a in embed]) if embed else no_vectors(),
+                return_exceptions=True
+            )
+            # Failed scores and embeddings are stored as NULL so the next ingest retries them
+            sentiments = {
+                a["URL"]: None if isinstance(s, BaseException) or s == "UNKNOWN" else s for a, s in zip(score, scores)
+            }
+            if isinstance(vectors, BaseException):
+                print(f"Embedding news for {ticker} failed: {vectors}")
+                vectors = []
+            embeddings = {a["URL"]: v for a, v in zip(embed, vectors)}
+            changed = list({a["URL"]: a for a in score + embed}.values())
+            await asyncio.to_thread(self.upsert, changed, sentiments, embeddings, model)
+
+        await asyncio.to_thread(self.link, ticker, articles)
+
+    def article_chunks(self, ticker: str, articles: list, intents: list) -> List[Dict]:
+        """
+        One retrieval chunk per article; articles already in the store carry their
+        precomputed embedding (if made by the current model) so they need not be
+        embedded again
+        """
+        articles = [a for a in articles if isinstance(a, dict)]
+        stored = self.embeddings([canonical_url(a["URL"]) for a in articles if a.get("URL")], embedding_model_id())
+
+        chunks = []
+        for i, article in enumerate(articles):
+            chunk = {
+                "source": "news_summary",
+                "ticker": ticker,
+                "intent_tags": intents,
+                "chunk_id": f"news_summary_{i}",
+                "text": article_text(article)
+            }
+            embedding = stored.get(canonical_url(article["URL"])) if article.get("URL") else None
+            if embedding is not None:
+                chunk["embedding"] = embedding
+            chunks.append(chunk)
+        return chunks
+
+news_store = NewsStore()
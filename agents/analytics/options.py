@@ -0,0 +1,182 @@
+import asyncio
+from datetime import date
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from utils.cache import cached
+from agents.api.yfinance_client import run_yahoo, YF_CACHE_TTL
+from agents.api.symbol_master import symbol_master
+
+MAX_EXPIRIES = 4
+SKEW_MONEYNESS = 0.05
+MIN_IV = 0.01
+TOP_STRIKES = 3
+
+def _fetch_chain(company: yf.Ticker, expiry: str):
+    """
+    Fetches calls and puts for one expiry with a single option_chain request.
+
+    Safe to run for several expiries on one Ticker: the caller has already loaded
+    company.options, so each call only reads the expiry map and re-stores the same
+    expiries and underlying quote; the HTTP session is shared by all Tickers anyway.
+    A Ticker per thread would refetch the expiry list once per thread.
+    """
+    chain = company.option_chain(expiry)
+    return expiry, chain.calls, chain.puts, getattr(chain, "underlying", None)
+
+def _spot_price(company: yf.Ticker, underlying) -> float | None:
+    if isinstance(underlying, dict) and underlying.get("regularMarketPrice"):
+        return float(underlying["regularMarketPrice"])
+    try:
+        return float(company.fast_info["last_price"])
+    except Exception:
+        return None
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in df.columns:
+        return np.zeros(len(df))
+    return df[name].fillna(0).to_numpy(dtype=float)
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    return round(float(numerator) / float(denominator), 4) if denominator else None
+
+def _round(value) -> float | None:
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+def max_pain(calls: pd.DataFrame, puts: pd.DataFrame) -> float | None:
+    """
+    Strike at which the total intrinsic value owed to option holders is lowest
+    """
+    call_k, call_oi = _column(calls, "strike"), _column(calls, "openInterest")
+    put_k, put_oi = _column(puts, "strike"), _column(puts, "openInterest")
+    strikes = np.union1d(call_k, put_k)
+    if strikes.size == 0 or (call_oi.sum() + put_oi.sum()) == 0:
+        return None
+
+    # Rows are candidate settlement prices, columns are listed contracts
+    call_pain = (np.clip(strikes[:, None] - call_k[None, :], 0, None) * call_oi).sum(axis=1)
+    put_pain = (np.clip(put_k[None, :] - strikes[:, None], 0, None) * put_oi).sum(axis=1)
+    return float(strikes[np.argmin(call_pain + put_pain)])
+
+def oi_weighted_strike(df: pd.DataFrame) -> float | None:
+    oi = _column(df, "openInterest")
+    if oi.sum() == 0:
+        return None
+    return _round(np.average(_column(df, "strike"), weights=oi))
+
+def top_oi_strikes(df: pd.DataFrame, n: int = TOP_STRIKES) -> list:
+    if df.empty or "openInterest" not in df.columns:
+        return []
+    top = df.nlargest(n, "openInterest")
+    return [float(k) for k in top["strike"]]
+
+def iv_at(df: pd.DataFrame, strike: float) -> float | None:
+    """
+    Implied volatility of the contract closest to the given strike, ignoring
+    the near-zero placeholder values Yahoo reports for untraded strikes
+    """
+    if df.empty or "impliedVolatility" not in df.columns:
+        return None
+    liquid = df[df["impliedVolatility"] > MIN_IV]
+    if liquid.empty:
+        return None
+    idx = np.abs(liquid["strike"].to_numpy(dtype=float) - strike).argmin()
+    return float(liquid["impliedVolatility"].iloc[idx])
+
+def summarize_expiry(expiry: str, calls: pd.DataFrame, puts: pd.DataFrame, spot: float | None) -> dict:
+    call_volume, put_volume = _column(calls, "volume").sum(), _column(puts, "volume").sum()
+    call_oi, put_oi = _column(calls, "openInterest").sum(), _column(puts, "openInterest").sum()
+
+    summary = {
+        "expiry": expiry,
+        "days_to_expiry": (date.fromisoformat(expiry) - date.today()).days,
+        "call_volume": int(call_volume),
+        "put_volume": int(put_volume),
+        "put_call_volume_ratio": _ratio(put_volume, call_volume),
+        "call_open_interest": int(call_oi),
+        "put_open_interest": int(put_oi),
+        "put_call_oi_ratio": _ratio(put_oi, call_oi),
+        "max_pain": max_pain(calls, puts),
+        "call_oi_weighted_strike": oi_weighted_strike(calls),
+        "put_oi_weighted_strike": oi_weighted_strike(puts),
+        "top_call_oi_strikes": top_oi_strikes(calls),
+        "top_put_oi_strikes": top_oi_strikes(puts),
+        "atm_iv": None,
+        "skew": None,
+    }
+
+    if spot:
+        atm = [iv for iv in (iv_at(calls, spot), iv_at(puts, spot)) if iv is not None]
+        summary["atm_iv"] = _round(np.mean(atm)) if atm else None
+
+        # Risk reversal: OTM put IV minus OTM call IV at symmetric moneyness
+        put_iv = iv_at(puts, spot * (1 - SKEW_MONEYNESS))
+        call_iv = iv_at(calls, spot * (1 + SKEW_MONEYNESS))
+        if put_iv is not None and call_iv is not None:
+            summary["skew"] = _round(put_iv - call_iv)
+
+    return summary
+
+@cached(YF_CACHE_TTL)
+async def get_option_summary_yf(ticker: str, max_expiries: int = MAX_EXPIRIES) -> dict:
+    """
+    Fetch the nearest option expiries concurrently and reduce them to compact analytics.
+
+    Takes Args: ticker and max_expiries (number of nearest expiries to analyze)
+    Returns: Dict with aggregate ratios and a per-expiry term structure, or error
+    """
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
+    try:
+        expiries = list(await run_yahoo(lambda: company.options))
+    except Exception as e:
+        return {"error": f"Error: failed to fetch options data for {ticker}: {e}"}
+
+    if not expiries:
+        return {"error": f"No listed options for {ticker}."}
+
+    fetched = await asyncio.gather(
+        *(run_yahoo(_fetch_chain, company, expiry) for expiry in expiries[:max_expiries]),
+        return_exceptions=True
+    )
+    chains = [c for c in fetched if not isinstance(c, Exception)]
+    if not chains:
+        return {"error": f"Error: getting option chain for {ticker}: {fetched[0]}"}
+
+    spot = _spot_price(company, chains[0][3])
+    term_structure = [summarize_expiry(expiry, calls, puts, spot) for expiry, calls, puts, _ in chains]
+
+    total_call_volume = sum(e["call_volume"] for e in term_structure)
+    total_put_volume = sum(e["put_volume"] for e in term_structure)
+    total_call_oi = sum(e["call_open_interest"] for e in term_structure)
+    total_put_oi = sum(e["put_open_interest"] for e in term_structure)
+
+    return {
+        "ticker": ticker,
+        "spot": _round(spot),
+        "expiries_available": len(expiries),
+        "put_call_volume_ratio": _ratio(total_put_volume, total_call_volume),
+        "put_call_oi_ratio": _ratio(total_put_oi, total_call_oi),
+        "term_structure": term_structure,
+    }
+
+def format_option_summary(summary: dict) -> str:
+    """
+    Renders an option summary as a few compact lines for the LLM prompt
+    """
+    if not isinstance(summary, dict) or "term_structure" not in summary:
+        return ""
+
+    lines = [
+        f"Spot: {summary.get('spot')} | Put/Call volume ratio: {summary.get('put_call_volume_ratio')}"
+        f" | Put/Call OI ratio: {summary.get('put_call_oi_ratio')}"
+    ]
+    for e in summary["term_structure"]:
+        lines.append(
+            f"{e['expiry']} ({e['days_to_expiry']}d): max pain {e['max_pain']}, "
+            f"ATM IV {e['atm_iv']}, skew {e['skew']}, P/C OI {e['put_call_oi_ratio']}, "
+            f"call OI strikes {e['top_call_oi_strikes']}, put OI strikes {e['top_put_oi_strikes']}"
+        )
+    return "\n".join(lines)
@@ -1,10 +1,10 @@
 import os
-import requests
+from utils.http import get_http_client
 
 HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 FINBERT_MODEL = "ProsusAI/finbert"
 
-def analyze_sentiment_finbert(text: str) -> str:
+async def analyze_sentiment_finbert(text: str) -> str:
     url = f"https://api-inference.huggingface.co/models/{FINBERT_MODEL}"
     headers = {
         "Authorization": f"Bearer {HUGGINGFACE_API_KEY}"
@@ -15,7 +15,7 @@ def analyze_sentiment_finbert(text: str) -> str:
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = await get_http_client().post(url, headers=headers, json=payload, timeout=30)
         predictions = response.json()
         if isinstance(predictions, list) and predictions:
             top = max(predictions[0], key=lambda x: x['score'])
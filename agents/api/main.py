@@ -1,5 +1,6 @@
 import yfinance as yf
 from datetime import datetime, timedelta
+from agents.api.quotes import fetch_quote
 
 def get_date_range(time_frame: str):
     """
@@ -22,6 +23,22 @@ def get_stock_data(ticker: str, time_frame: str = "today") -> dict:
     """
     Fetches stock price data for a given ticker and time frame
     """
+    if time_frame.lower() == "today":
+        # Today's bar comes from the lightweight quote snapshot instead of a download
+        quote = fetch_quote(ticker.upper())
+        if "error" in quote:
+            return quote
+        return {
+            "ticker": quote["symbol"],
+            # Trading date as before, not the UTC date of the snapshot
+            "date": quote["trade_date"],
+            "open": quote["open"],
+            "close": quote["price"],
+            "high": quote["day_high"],
+            "low": quote["day_low"],
+            "volume": quote["volume"]
+        }
+
     start, end = get_date_range(time_frame)
     if not start or not end:
         return {"error": f"Unsupported time_frame: {time_frame}"}
@@ -0,0 +1,254 @@
+import os
+import re
+import time
+import fcntl
+import threading
+from collections import defaultdict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from agents.api.symbol_master import SAFE_TICKER
+
+STORE_DIR = Path(os.getenv("PRICE_STORE_DIR", "data/price_store"))
+SYNC_TTL = float(os.getenv("PRICE_STORE_SYNC_TTL", "60"))
+STORED_INTERVALS = {"1d", "1wk", "1mo"}
+# Coverage marker for files fetched with period="max"
+FULL_HISTORY = np.iinfo(np.int64).min
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("dividends", "<f8"),
+    ("splits", "<f8"),
+])
+
+# yfinance history column -> bar field
+COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "splits",
+}
+
+def to_bars(df: pd.DataFrame) -> np.ndarray:
+    """
+    Converts a yfinance history frame into a structured bar array keyed by UTC nanoseconds
+    """
+    bars = np.zeros(len(df), dtype=BAR_DTYPE)
+    if df.empty:
+        return bars
+
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    bars["ts"] = index.as_unit("ns").asi8
+    for column, field in COLUMNS.items():
+        if column in df.columns:
+            bars[field] = df[column].to_numpy(dtype=float, na_value=np.nan)
+    return bars
+
+def to_frame(bars: np.ndarray) -> pd.DataFrame:
+    """
+    Converts stored bars back into the yfinance history layout with a Date column
+    """
+    frame = pd.DataFrame({column: bars[field] for column, field in COLUMNS.items()})
+    frame.insert(0, "Date", pd.to_datetime(bars["ts"], unit="ns", utc=True))
+    return frame
+
+def period_start(period: str, interval: str, now: pd.Timestamp = None) -> pd.Timestamp | None:
+    """
+    Earliest bar a yfinance period string needs; None for "max". Raises ValueError
+    for periods that are not understood.
+    """
+    if period == "max":
+        return None
+
+    now = now or pd.Timestamp.now(tz="UTC")
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d" and interval == "1d":
+        # Yahoo counts day periods in trading sessions; cover them with calendar days to spare
+        n = 2 * n + 7
+    return now - {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }[unit]
+
+def period_slice(bars: np.ndarray, period: str, interval: str, now: pd.Timestamp = None) -> np.ndarray | None:
+    """
+    Returns the view of bars covering a yfinance period string, or None if the
+    period is not understood (the caller then falls back to a direct fetch)
+    """
+    try:
+        start = period_start(period, interval, now)
+    except ValueError:
+        return None
+    if start is None:
+        return bars
+    if period.endswith("d") and interval == "1d":
+        return bars[-int(period[:-1]):]
+    return bars[np.searchsorted(bars["ts"], start.value):]
+
+class PriceStore:
+    """
+    Append-only per-ticker OHLCV files read through np.memmap.
+
+    Each (ticker, interval) is one fixed-width binary file. The first request for a
+    ticker fetches only the period it asks for; a later request for a longer period
+    refetches from its start. A sidecar .from file records how far back the file
+    was fetched, so a young listing is not refetched on every request.
+
+    A sync fetches only the bars from the last stored one onwards: the last bar is
+    overwritten in place (it may have been a partial session) and newer bars are
+    appended. A new dividend or split re-adjusts history, so it triggers a refetch
+    of the covered range written to a temp file and swapped in atomically; files
+    are never truncated under live readers.
+    """
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks = defaultdict(threading.Lock)
+        self._synced_at = {}
+
+    def _path(self, ticker: str, interval: str) -> Path:
+        # Tickers become file names, so anything outside Yahoo's symbol alphabet is refused
+        ticker = ticker.upper()
+        if not SAFE_TICKER.match(ticker) or interval not in STORED_INTERVALS:
+            raise ValueError(f"Invalid ticker or interval for the price store: {ticker!r}, {interval!r}")
+        return self.root / f"{ticker}_{interval}.bin"
+
+    @staticmethod
+    def _covered_from(path: Path, stored: np.ndarray) -> int | None:
+        """
+        Start (ns) of the range the file was fetched for; files written before the
+        sidecar existed always came from a "max" fetch
+        """
+        try:
+            return int(path.with_suffix(".from").read_text())
+        except (FileNotFoundError, ValueError):
+            return FULL_HISTORY if stored.size else None
+
+    def _fetch(self, company, path: Path, interval: str, start: int):
+        if start == FULL_HISTORY:
+            frame = company.history(period="max", interval=interval)
+        else:
+            since = pd.Timestamp(start, unit="ns", tz="UTC")
+            frame = company.history(start=since.strftime("%Y-%m-%d"), interval=interval)
+        bars = to_bars(frame)
+        if bars.size:
+            self._rewrite(path, bars)
+            path.with_suffix(".from").write_text(str(start))
+
+    def bars(self, ticker: str, interval: str = "1d") -> np.ndarray:
+        """
+        Zero-copy, read-only view over every stored bar
+        """
+        path = self._path(ticker, interval)
+        count = path.stat().st_size // BAR_DTYPE.itemsize if path.exists() else 0
+        if count == 0:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def _rewrite(self, path: Path, bars: np.ndarray):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(bars.tobytes())
+        os.replace(tmp_path, path)
+
+    def _merge(self, path: Path, stored: np.ndarray, fresh: np.ndarray) -> bool:
+        """
+        Applies a delta fetch to the file; returns False if a full refetch is needed
+        """
+        last_ts = stored["ts"][-1]
+        fresh = fresh[fresh["ts"] >= last_ts]
+        if fresh.size == 0:
+            return True
+
+        overwrite = fresh[:1] if fresh["ts"][0] == last_ts else fresh[:0]
+        newer = fresh[fresh["ts"] > last_ts]
+
+        # NaN means "no action" for Yahoo; NaN != NaN must not force a refetch on every sync
+        actions_changed = bool(np.any(np.nan_to_num(newer["dividends"]) != 0)
+                               or np.any(np.nan_to_num(newer["splits"]) != 0))
+        if overwrite.size:
+            for field in ("dividends", "splits"):
+                actions_changed |= not np.array_equal(overwrite[field], stored[field][-1:], equal_nan=True)
+        if actions_changed:
+            return False
+
+        with open(path, "r+b") as f:
+            if overwrite.size:
+                f.seek((len(stored) - 1) * BAR_DTYPE.itemsize)
+                f.write(overwrite.tobytes())
+            f.seek(0, os.SEEK_END)
+            f.write(newer.tobytes())
+        return True
+
+    def sync(self, ticker: str, interval: str = "1d", period: str = "max"):
+        """
+        Makes the file cover the period and brings it up to date; the delta sync runs
+        at most once per SYNC_TTL seconds per process
+        """
+        start = period_start(period, interval)
+        needed = FULL_HISTORY if start is None else start.value
+        key = (ticker.upper(), interval)
+        path = self._path(ticker, interval)
+        with self._locks[key]:
+            stored = self.bars(ticker, interval)
+            covered = self._covered_from(path, stored)
+            fresh_sync = time.monotonic() - self._synced_at.get(key, float("-inf")) < SYNC_TTL
+            if covered is not None and covered <= needed and fresh_sync:
+                return
+
+            # Serialises writers across uvicorn worker processes
+            with open(path.with_suffix(".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                company = yf.Ticker(ticker)
+                stored = self.bars(ticker, interval)
+                covered = self._covered_from(path, stored)
+
+                if covered is None or covered > needed:
+                    # Backfill: one fetch from the earliest start anyone has asked for
+                    self._fetch(company, path, interval, needed if covered is None else min(needed, covered))
+                else:
+                    last = pd.Timestamp(int(stored["ts"][-1]), unit="ns", tz="UTC")
+                    fresh = to_bars(company.history(start=last.strftime("%Y-%m-%d"), interval=interval))
+                    if not self._merge(path, stored, fresh):
+                        self._fetch(company, path, interval, covered)
+
+            self._synced_at[key] = time.monotonic()
+
+    def history(self, ticker: str, period: str, interval: str = "1d") -> pd.DataFrame | None:
+        """
+        Returns history for a period from the local store after a delta sync, or None
+        when the interval or period is not served from the store
+        """
+        if interval not in STORED_INTERVALS:
+            return None
+
+        try:
+            period_start(period, interval)
+        except ValueError:
+            return None
+
+        self.sync(ticker, interval, period)
+        window = period_slice(self.bars(ticker, interval), period, interval)
+        if window is None:
+            return None
+        return to_frame(window)
+
+price_store = PriceStore()
@@ -0,0 +1,100 @@
+import os
+import math
+import asyncio
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import yfinance as yf
+from utils.cache import TTLCache
+from agents.api.yfinance_client import run_yahoo
+from agents.api.symbol_master import symbol_master
+
+QUOTE_TTL = float(os.getenv("QUOTE_TTL", "5"))
+QUOTE_MAX_SYMBOLS = int(os.getenv("QUOTE_MAX_SYMBOLS", "100"))
+
+# Snapshot table shared by every request: symbol -> latest quote, refreshed at most
+# once per QUOTE_TTL with concurrent misses for a symbol sharing one fetch
+_snapshots = TTLCache(QUOTE_TTL, maxsize=4096)
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+def _trade_date(tz_name: str | None) -> str:
+    """
+    Session date in the exchange's own timezone; weekends roll back to Friday.
+    fast_info has no last-trade timestamp, so exchange holidays are not known here.
+    """
+    try:
+        now = datetime.now(ZoneInfo(tz_name)) if tz_name else datetime.now(timezone.utc)
+    except (ZoneInfoNotFoundError, ValueError):
+        now = datetime.now(timezone.utc)
+    day = now.date()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+def fetch_quote(symbol: str) -> dict:
+    """
+    Last price snapshot from yfinance fast_info, which skips the full .info payload.
+
+    Takes Args: symbol (str)
+    Returns: Dict with price fields or error
+    """
+    try:
+        info = yf.Ticker(symbol).fast_info
+        price = _number(info.last_price)
+        if price is None:
+            return {"error": f"No quote available for {symbol}."}
+
+        previous_close = _number(info.previous_close)
+        change = price - previous_close if previous_close else None
+        volume = _number(info.last_volume)
+        return {
+            "symbol": symbol,
+            "price": price,
+            "previous_close": previous_close,
+            "change": change,
+            "change_pct": change / previous_close * 100 if change is not None else None,
+            "open": _number(info.open),
+            "day_high": _number(info.day_high),
+            "day_low": _number(info.day_low),
+            "volume": int(volume) if volume is not None else None,
+            "currency": info.currency,
+            "exchange": info.exchange,
+            "trade_date": _trade_date(info.timezone),
+            "as_of": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    except Exception as e:
+        return {"error": f"Error: getting quote for {symbol}: {e}"}
+
+async def get_quote(symbol: str) -> dict:
+    symbol = symbol.strip().upper()
+    if (error := symbol_master.check(symbol)) is not None:
+        return error
+    return await _snapshots.get_or_fetch(symbol, lambda: run_yahoo(fetch_quote, symbol))
+
+async def get_quotes(symbols: list) -> dict:
+    """
+    Quotes for many symbols at once; each symbol maps to its quote or an error dict
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+    quotes = await asyncio.gather(*(get_quote(symbol) for symbol in symbols))
+    return dict(zip(symbols, quotes))
+
+def format_quote(quote: dict) -> str:
+    """
+    One-line spoken answer for a price question
+    """
+    if "error" in quote:
+        return quote["error"]
+
+    text = f"{quote['symbol']} is trading at {quote['price']:.2f}"
+    if quote.get("currency"):
+        text += f" {quote['currency']}"
+    if quote.get("change") is not None:
+        direction = "up" if quote["change"] >= 0 else "down"
+        text += f", {direction} {abs(quote['change']):.2f} ({abs(quote['change_pct']):.2f}%) from the previous close"
+    return text + "."
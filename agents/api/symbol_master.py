@@ -0,0 +1,193 @@
+import os
+import re
+import csv
+import difflib
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict
+
+# Relative paths resolve against the repository root, not the working directory
+ROOT = Path(__file__).resolve().parents[2]
+SYMBOL_MASTER_PATH = ROOT / os.getenv("SYMBOL_MASTER_PATH", "data/symbols.csv")
+# When set, tickers missing from the master are rejected instead of passed through to Yahoo
+SYMBOL_MASTER_STRICT = os.getenv("SYMBOL_MASTER_STRICT", "0") == "1"
+# Strict mode needs a full listing; against a smaller file (like the seed) it is ignored
+SYMBOL_MASTER_STRICT_MIN = int(os.getenv("SYMBOL_MASTER_STRICT_MIN", "1000"))
+FUZZY_CUTOFF = 0.85
+# Shorter queries ("Alpha", "GE") only match exactly; fuzzy matching them is guesswork
+FUZZY_MIN_LENGTH = 4
+# Fuzzy matches for different tickers scoring this close are ambiguous
+FUZZY_AMBIGUITY = 0.05
+
+# Syntax every ticker must have, known or not: AAPL, BRK-B, ^GSPC, EURUSD=X
+SAFE_TICKER = re.compile(r"^[A-Z0-9^][A-Z0-9.\-^=]{0,14}$")
+
+# Dropped when normalising names so "Apple Inc." and "apple" match
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "holdings", "holding", "group", "sa", "ag", "nv", "the", "class", "a", "b", "c",
+}
+
+def normalize_name(name: str) -> str:
+    words = re.sub(r"[^a-z0-9 ]+", " ", name.lower().replace("&", " and ")).split()
+    kept = [w for w in words if w not in NAME_SUFFIXES]
+    return " ".join(kept or words)
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SymbolIndex:
+    """
+    Immutable lookup tables built from one load of the symbol file
+    """
+    def __init__(self, rows: List[Dict]):
+        self.records = {}                   # ticker -> row
+        self.by_isin = {}                   # ISIN -> ticker
+        self.by_name = {}                   # normalised name or alias -> ticker
+        self.grams = defaultdict(set)       # trigram -> normalised names containing it
+        self.words = defaultdict(set)       # word of a normalised name -> tickers
+
+        for row in rows:
+            ticker = row["ticker"].strip().upper()
+            if not ticker:
+                continue
+            record = {
+                "ticker": ticker,
+                "name": row.get("name", "").strip(),
+                "aliases": [a.strip() for a in row.get("aliases", "").split("|") if a.strip()],
+                "exchange": row.get("exchange", "").strip(),
+                "isin": row.get("isin", "").strip().upper(),
+            }
+            self.records[ticker] = record
+            if record["isin"]:
+                self.by_isin[record["isin"]] = ticker
+
+            for name in [record["name"], *record["aliases"]]:
+                key = normalize_name(name)
+                if key and key not in self.by_name:
+                    self.by_name[key] = ticker
+                    for gram in trigrams(key):
+                        self.grams[gram].add(key)
+                for word in key.split():
+                    self.words[word].add(ticker)
+
+class SymbolMaster:
+    """
+    Local symbol master (ticker, name, aliases, exchange, ISIN) read from a CSV at
+    startup. Validation and name lookup never touch the network; reload() swaps in
+    a freshly built index so readers always see a complete one.
+    """
+    def __init__(self, path: Path = SYMBOL_MASTER_PATH, strict: bool = SYMBOL_MASTER_STRICT,
+                 strict_min: int = SYMBOL_MASTER_STRICT_MIN):
+        self.path = Path(path)
+        self.strict = strict
+        self.strict_min = strict_min
+        self._index = SymbolIndex([])
+        self.reload()
+
+    def reload(self, path: Path = None) -> int:
+        """
+        Rebuilds the indexes from the CSV file and returns the number of symbols loaded
+        """
+        path = Path(path or self.path)
+        if not path.exists():
+            print(f"Symbol master file {path} not found; ticker validation is disabled.")
+            return len(self._index.records)
+
+        with open(path, newline="", encoding="utf-8") as f:
+            index = SymbolIndex(list(csv.DictReader(f)))
+        self._index = index
+        self.path = path
+        print(f"Loaded {len(index.records)} symbols from {path}.")
+        if self.strict and len(index.records) < self.strict_min:
+            print(f"Symbol master has fewer than {self.strict_min} symbols; strict mode is off.")
+        return len(index.records)
+
+    def __len__(self) -> int:
+        return len(self._index.records)
+
+    def get(self, ticker: str) -> Dict | None:
+        return self._index.records.get(ticker.strip().upper())
+
+    def check(self, ticker: str) -> Dict | None:
+        """
+        Returns an error dict for a ticker that cannot exist, otherwise None.
+        Malformed tickers always fail; unknown ones only in strict mode, and only
+        with a master large enough to be a full listing.
+        """
+        if not ticker or not ticker.strip():
+            return {"error": "Ticker symbol is required."}
+        if not SAFE_TICKER.match(ticker.strip().upper()):
+            return {"error": f"Invalid ticker symbol '{ticker}'."}
+        strict = self.strict and len(self._index.records) >= self.strict_min
+        if strict and self.get(ticker) is None:
+            return {"error": f"Company ticker '{ticker}' not found."}
+        return None
+
+    def lookup(self, query: str) -> Dict | None:
+        """
+        Resolves a ticker, ISIN, company name or alias to its symbol record,
+        falling back to fuzzy name matching; short or ambiguous queries give None
+        """
+        index = self._index
+        query = query.strip()
+        if not query:
+            return None
+
+        if (record := index.records.get(query.upper())) is not None:
+            return record
+        if (ticker := index.by_isin.get(query.upper())) is not None:
+            return index.records[ticker]
+
+        key = normalize_name(query)
+        if (ticker := index.by_name.get(key)) is not None:
+            return index.records[ticker]
+
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+
+        # A word shared by several companies' names ("Morgan") names none of them
+        holders = set.intersection(*(index.words.get(word, set()) for word in key.split()))
+        if len(holders) > 1:
+            return None
+
+        # Shortlist names sharing trigrams with the query, then rank them with difflib
+        shared = defaultdict(int)
+        for gram in trigrams(key):
+            for name in index.grams.get(gram, ()):
+                shared[name] += 1
+        shortlist = sorted(shared, key=shared.get, reverse=True)[:20]
+        scored = []
+        for name in shortlist:
+            ratio = difflib.SequenceMatcher(None, key, name).ratio()
+            if ratio >= FUZZY_CUTOFF:
+                scored.append((ratio, index.by_name[name]))
+        if not scored:
+            return None
+
+        best, ticker = max(scored)
+        if any(t != ticker and best - ratio <= FUZZY_AMBIGUITY for ratio, t in scored):
+            return None
+        return index.records[ticker]
+
+    def resolve(self, queries: List[str]) -> List[str]:
+        """
+        Maps tickers or company names to tickers. Anything unresolved is kept only
+        when it was given as a ticker (upper case, valid syntax) that check() accepts;
+        unknown names such as "Ford" are dropped rather than guessed as "FORD".
+        """
+        tickers = []
+        for query in queries:
+            if not isinstance(query, str) or not query.strip():
+                continue
+            query = query.strip()
+            if (record := self.lookup(query)) is not None:
+                tickers.append(record["ticker"])
+            elif SAFE_TICKER.match(query) and self.check(query) is None:
+                tickers.append(query)
+            else:
+                print(f"Could not resolve '{query}' to a ticker; dropped.")
+        return list(dict.fromkeys(tickers))
+
+symbol_master = SymbolMaster()
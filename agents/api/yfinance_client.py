@@ -1,8 +1,20 @@
-import json
+import os
+import asyncio
+import functools
 from enum import Enum
 import pandas as pd
 import yfinance as yf
 from utils.timeframe_parser import parse_natural_timeframe
+from utils.cache import cached
+from agents.api.price_store import price_store
+from agents.api.symbol_master import symbol_master
+
+YF_MAX_CONCURRENCY = int(os.getenv("YF_MAX_CONCURRENCY", "8"))
+YF_CACHE_TTL = float(os.getenv("YF_CACHE_TTL", "300"))
+
+# Shared by every request (single /mcp/ calls and batch fan-out alike) so that
+# bursts never have more than YF_MAX_CONCURRENCY calls in flight to Yahoo
+_yahoo_slots = asyncio.Semaphore(YF_MAX_CONCURRENCY)
 
 class FinancialType(str, Enum):
     income_stmt = "income_stmt"
@@ -24,51 +36,93 @@ class RecommendationType(str, Enum):
     recommendations = "recommendations"
     upgrades_downgrades = "upgrades_downgrades"
 
-async def get_historical_stock_prices_yf(ticker: str, user_input_time: str = "1mo", interval: str = "1d") -> dict:
+async def run_yahoo(fn, *args, **kwargs):
+    """
+    Runs a blocking yfinance call in the default executor under the shared Yahoo rate limit
+    """
+    async with _yahoo_slots:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+def _blocking(fn):
+    """
+    Exposes a blocking yfinance call as a cached coroutine that runs in the default
+    executor, so it does not stall the event loop
+    """
+    @cached(YF_CACHE_TTL)
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_yahoo(fn, *args, **kwargs)
+    return wrapper
+
+def _to_records(df: pd.DataFrame) -> list:
+    """
+    Converts a DataFrame into a list of JSON-native records in one vectorized pass.
+    Datetime columns become ISO strings and missing values become None.
+    """
+    if df is None or df.empty:
+        return []
+
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            if series.dt.tz is not None:
+                series = series.dt.tz_convert("UTC")
+            df[col] = series.dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    if "Volume" in df.columns and pd.api.types.is_float_dtype(df["Volume"]):
+        # The price store keeps volume as float64; Yahoo reports whole shares
+        df["Volume"] = df["Volume"].round().astype("Int64")
+
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+@_blocking
+def get_historical_stock_prices_yf(ticker: str, user_input_time: str = "1mo", interval: str = "1d") -> list | dict:
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
     period = parse_natural_timeframe(user_input_time)
     company = yf.Ticker(ticker)
 
     try:
-        if company.isin is None:
-            return {"error": f"Company ticker '{ticker}' not found."}
-    except Exception as e:
-        return {"error": f"Error: {str(e)}"}
-
-    try:
-        hist_data = company.history(period=period, interval=interval)
-        hist_data = hist_data.reset_index(names="Date")
-        return json.loads(hist_data.to_json(orient="records", date_format="iso"))
+        # Daily and coarser bars come from the local store, which only fetches the delta
+        hist_data = price_store.history(ticker, period, interval)
+        if hist_data is None:
+            hist_data = company.history(period=period, interval=interval)
+            hist_data = hist_data.reset_index(names="Date")
+        return _to_records(hist_data)
     except Exception as e:
         return {"error": f"Failed to fetch or format historical data: {str(e)}"}
 
-async def get_stock_info_yf(ticker: str) -> str:
+@_blocking
+def get_stock_info_yf(ticker: str) -> dict:
     """
     Get stock information for a given ticker symbol.
 
     Takes Args: ticker (str)
-    Returns: JSON string with stock details or error
+    Returns: Dict with stock details or error
     """
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
     company = yf.Ticker(ticker)
+
     try:
-        if company.isin is None:
-            return f"Company ticker {ticker} not found."
+        return dict(company.info)
     except Exception as e:
-        return f"Error: getting stock information for {ticker}: {e}"
+        return {"error": f"Error: getting stock information for {ticker}: {e}"}
 
-    info = company.info
-    return json.dumps(info)
-
-async def get_yahoo_finance_news_yf(ticker: str) -> list:
+@_blocking
+def get_yahoo_finance_news_yf(ticker: str) -> list:
     """
     Get latest Yahoo Finance news for a ticker
     """
-    company = yf.Ticker(ticker)
-    try:
-        if company.isin is None:
-            return []
-    except Exception:
+    if symbol_master.check(ticker) is not None:
         return []
 
+    company = yf.Ticker(ticker)
+
     try:
         news_data = company.news
     except Exception:
@@ -82,39 +136,43 @@ async def get_yahoo_finance_news_yf(ticker: str) -> list:
                 "Title": content.get("title", ""),
                 "Summary": content.get("summary", ""),
                 "Description": content.get("description", ""),
-                "URL": content.get("canonicalUrl", {}).get("url", "")
+                "URL": content.get("canonicalUrl", {}).get("url", ""),
+                "Published": content.get("pubDate", "")
             })
 
     return news_list
 
-async def get_stock_actions_yf(ticker: str) -> str:
+@_blocking
+def get_stock_actions_yf(ticker: str) -> list | dict:
     """
     Get stock dividends and stock splits for a given ticker.
 
     Takes Args: ticker - Stock symbol
-    Returns: JSON string of stock action records
+    Returns: List of stock action records or error
     """
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
     try:
         company = yf.Ticker(ticker)
         actions_df = company.actions
         actions_df = actions_df.reset_index(names="Date")
-        return actions_df.to_json(orient="records", date_format="iso")
+        return _to_records(actions_df)
     except Exception as e:
-        return f"Error: getting stock actions for {ticker}: {e}"
+        return {"error": f"Error: getting stock actions for {ticker}: {e}"}
 
-async def get_financial_statement_yf(ticker: str, financial_type: str) -> str:
+@_blocking
+def get_financial_statement_yf(ticker: str, financial_type: str) -> list | dict:
     """
     Get financial statement for a given ticker.
 
     Takes Args: ticker and financial_type (One of the predefined FinancialType values)
-    Returns: JSON of financial data by date
+    Returns: List of financial data records by date or error
     """
-    try:
-        company = yf.Ticker(ticker)
-        if company.isin is None:
-            return f"Error: Company ticker {ticker} not found."
-    except Exception as e:
-        return f"Error: getting financial statement for {ticker}: {e}"
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
 
     match financial_type:
         case "income_stmt":
@@ -130,31 +188,30 @@ async def get_financial_statement_yf(ticker: str, financial_type: str) -> str:
         case "quarterly_cashflow":
             data = company.quarterly_cashflow
         case _:
-            return f"Error: Invalid financial_type `{financial_type}`"
+            return {"error": f"Error: Invalid financial_type `{financial_type}`"}
 
-    result = []
-    for col in data.columns:
-        date_str = col.strftime("%Y-%m-%d") if isinstance(col, pd.Timestamp) else str(col)
-        entry = {"date": date_str}
-        for metric, value in data[col].items():
-            entry[metric] = None if pd.isna(value) else value
-        result.append(entry)
+    # Statements come back metric-by-date; transpose so each record is one reporting date
+    statement = data.T
+    if isinstance(statement.index, pd.DatetimeIndex):
+        statement.index = statement.index.strftime("%Y-%m-%d")
+    else:
+        statement.index = statement.index.astype(str)
+    statement.columns = statement.columns.astype(str)
 
-    return json.dumps(result)
+    return _to_records(statement.reset_index(names="date"))
 
-async def get_holder_info_yf(ticker: str, holder_type: str) -> str:
+@_blocking
+def get_holder_info_yf(ticker: str, holder_type: str) -> list | dict:
     """
     Get holder information (insiders, institutions, mutual funds) for a ticker
 
     Takes Args: ticker and holder_type (One of the predefined HolderType values)
-    Returns: JSON representation of holder data
+    Returns: List of holder records or error
     """
-    try:
-        company = yf.Ticker(ticker)
-        if company.isin is None:
-            return f"Error: Company ticker {ticker} not found."
-    except Exception as e:
-        return f"Error: getting holder info for {ticker}: {e}"
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
 
     try:
         match holder_type:
@@ -171,87 +228,84 @@ async def get_holder_info_yf(ticker: str, holder_type: str) -> str:
             case "insider_roster_holders":
                 df = company.insider_roster_holders
             case _:
-                return f"Error: Invalid holder type `{holder_type}`"
+                return {"error": f"Error: Invalid holder type `{holder_type}`"}
         
-        return df.to_json(orient="records", date_format="iso")
+        return _to_records(df)
     except Exception as e:
-        return f"Error: Failed to fetch {holder_type} for {ticker}: {e}"
+        return {"error": f"Error: Failed to fetch {holder_type} for {ticker}: {e}"}
 
-async def get_option_expiration_dates_yf(ticker: str) -> str:
+@_blocking
+def get_option_expiration_dates_yf(ticker: str) -> list | dict:
     """
     Fetch available options expiration dates for a given ticker symbol
 
     Takes Args: ticker
-    Returns: JSON array of expiration dates or error message
+    Returns: List of expiration dates or error
     """
-    try:
-        company = yf.Ticker(ticker)
-        if company.isin is None:
-            return f"Error: Company ticker {ticker} not found."
-    except Exception as e:
-        return f"Error: getting option expiration dates for {ticker}: {e}"
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
 
     try:
-        return json.dumps(company.options)
+        return list(company.options)
     except Exception as e:
-        return f"Error: failed to fetch options data for {ticker}: {e}"
+        return {"error": f"Error: failed to fetch options data for {ticker}: {e}"}
 
-async def get_option_chain_yf(ticker: str, expiration_date: str, option_type: str) -> str:
+@_blocking
+def get_option_chain_yf(ticker: str, expiration_date: str, option_type: str) -> list | dict:
     """
     Fetch option chain for given ticker, expiration date, and option type
 
     Takes Args: ticker, expiration_date and option_type
-    Returns: JSON string containing the option chain data or error
+    Returns: List of option chain records or error
     """
-    try:
-        company = yf.Ticker(ticker)
-        if company.isin is None:
-            return f"Error: Company ticker {ticker} not found."
-    except Exception as e:
-        return f"Error: creating Ticker object for {ticker}: {e}"
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
 
     if expiration_date not in company.options:
-        return f"Error: No options available for date {expiration_date}. Try get_option_expiration_dates."
+        return {"error": f"Error: No options available for date {expiration_date}. Try get_option_expiration_dates."}
 
     if option_type not in ["calls", "puts"]:
-        return "Error: Invalid option type. Use 'calls' or 'puts'."
+        return {"error": "Error: Invalid option type. Use 'calls' or 'puts'."}
 
     try:
         chain = company.option_chain(expiration_date)
         if option_type == "calls":
-            return chain.calls.to_json(orient="records", date_format="iso")
+            return _to_records(chain.calls)
         else:
-            return chain.puts.to_json(orient="records", date_format="iso")
+            return _to_records(chain.puts)
     except Exception as e:
-        return f"Error: getting option chain for {ticker}: {e}"
+        return {"error": f"Error: getting option chain for {ticker}: {e}"}
 
-async def get_recommendations_yf(ticker: str, recommendation_type: str, months_back: int = 12) -> str:
+@_blocking
+def get_recommendations_yf(ticker: str, recommendation_type: str, months_back: int = 12) -> list | dict:
     """
     Get analyst recommendations or upgrades/downgrades for a given ticker symbol.
 
     Takes Args: ticker, recommendation_type and months_back
-    Returns: JSON of relevant recommendations
+    Returns: List of relevant recommendation records or error
     """
-    try:
-        company = yf.Ticker(ticker)
-        if company.isin is None:
-            return f"Error: Company ticker {ticker} not found."
-    except Exception as e:
-        return f"Error: creating Ticker object for {ticker}: {e}"
+    if (error := symbol_master.check(ticker)) is not None:
+        return error
+
+    company = yf.Ticker(ticker)
 
     try:
         if recommendation_type == "recommendations":
-            return company.recommendations.to_json(orient="records")
+            return _to_records(company.recommendations)
 
         elif recommendation_type == "upgrades_downgrades":
             df = company.upgrades_downgrades.reset_index()
             cutoff = pd.Timestamp.now() - pd.DateOffset(months=months_back)
             df = df[df["GradeDate"] >= cutoff].sort_values("GradeDate", ascending=False)
             latest = df.drop_duplicates(subset=["Firm"])
-            return latest.to_json(orient="records", date_format="iso")
+            return _to_records(latest)
 
         else:
-            return "Error: Invalid recommendation_type. Use 'recommendations' or 'upgrades_downgrades'."
+            return {"error": "Error: Invalid recommendation_type. Use 'recommendations' or 'upgrades_downgrades'."}
 
     except Exception as e:
-        return f"Error: retrieving recommendations for {ticker}: {e}"
\ No newline at end of file
+        return {"error": f"Error: retrieving recommendations for {ticker}: {e}"}
\ No newline at end of file
@@ -36,4 +36,4 @@ async def run_fallback_summary(tickers: list, time_frame: str = "1mo") -> str:
 
     query = f"Compare {' and '.join(tickers)} over the last {time_frame}."
     prompt = build_multi_ticker_fallback_prompt(query, metadata)
-    return query_llm(prompt)
\ No newline at end of file
+    return await query_llm(prompt)
\ No newline at end of file
@@ -0,0 +1,201 @@
+import os
+import time
+import asyncio
+from collections import deque
+from dotenv import load_dotenv
+from utils.http import get_http_client
+
+load_dotenv()
+
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MODELS = [m.strip() for m in os.getenv(
+    "LLM_MODELS", "mistralai/devstral-small:free,mistralai/mistral-7b-instruct:free"
+).split(",") if m.strip()]
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "1") == "1"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "4.0"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+MIN_SAMPLES = 5
+
+class ModelStats:
+    """
+    Rolling latency window and circuit breaker state for one model
+    """
+    def __init__(self, name: str, window: int = 50):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        # Half-open: the single trial request let through after the cooldown is in flight
+        self.probing = False
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_latency(self, latency: float):
+        """
+        Records a lower bound for a request that lost a hedge race and was cancelled.
+        A cancelled trial request says nothing about health, so the next caller may probe.
+        """
+        self.latencies.append(latency)
+        self.probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.probing or self.consecutive_failures >= LLM_BREAKER_FAILURES:
+            # A failed trial request restarts the cooldown
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def available(self) -> bool:
+        """
+        Closed breakers are available; open ones become available (half-open) once
+        the cooldown has passed, until one trial request has been let through
+        """
+        if self.opened_at is None:
+            return True
+        return not self.probing and time.monotonic() - self.opened_at >= LLM_BREAKER_COOLDOWN
+
+    def admit(self) -> bool:
+        """
+        Claims a request slot: always for a closed breaker, and only for the first
+        caller after the cooldown for an open one (the half-open probe)
+        """
+        if self.opened_at is None:
+            return True
+        if not self.available():
+            return False
+        self.probing = True
+        return True
+
+    def quantile(self, q: float) -> float | None:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> dict:
+        return {
+            "model": self.name,
+            "samples": len(self.latencies),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "consecutive_failures": self.consecutive_failures,
+            "open": not self.available(),
+        }
+
+class LLMClient:
+    """
+    Chat-completions client over an ordered list of models with per-model circuit
+    breakers and hedged requests: if the current model has not answered within its
+    recent p95 latency, the next healthy model is raced against it.
+    """
+    def __init__(self, models: list = None, base_url: str = OPENROUTER_BASE_URL,
+                 api_key: str = OPENROUTER_API_KEY, timeout: float = LLM_TIMEOUT, hedge: bool = LLM_HEDGE):
+        self.models = list(models or LLM_MODELS)
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.api_key = api_key
+        self.timeout = timeout
+        self.hedge = hedge
+        self.stats = {m: ModelStats(m) for m in self.models}
+
+    def _stats(self, model: str) -> ModelStats:
+        if model not in self.stats:
+            self.stats[model] = ModelStats(model)
+        return self.stats[model]
+
+    def hedge_delay(self, model: str) -> float:
+        p = self._stats(model).quantile(LLM_HEDGE_QUANTILE)
+        return max(LLM_HEDGE_MIN_DELAY, p) if p is not None else LLM_HEDGE_DEFAULT_DELAY
+
+    def candidates(self, models: list = None) -> tuple[list, bool]:
+        """
+        Models worth trying, and whether breakers are bypassed because none is healthy
+        """
+        models = models or self.models
+        healthy = [m for m in models if self._stats(m).available()]
+        # With every breaker open, still try the configured order rather than fail outright
+        return (healthy, False) if healthy else (list(models), True)
+
+    async def _post(self, model: str, payload: dict, headers: dict) -> str:
+        start = time.monotonic()
+        try:
+            response = await get_http_client().post(
+                self.url, headers=headers, json={**payload, "model": model}, timeout=self.timeout
+            )
+            data = response.json()
+            if "choices" not in data or not data["choices"]:
+                raise ValueError(f"OpenRouter error: {data}")
+            content = data["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            self._stats(model).record_latency(time.monotonic() - start)
+            raise
+        except Exception:
+            self._stats(model).record_failure()
+            raise
+        self._stats(model).record_success(time.monotonic() - start)
+        return content
+
+    async def complete(self, prompt: str, temperature: float = 0.3, title: str = "veronica-rag-agent",
+                       models: list = None) -> str:
+        """
+        Sends the prompt and returns the first successful completion.
+        Raises the last error if every candidate model failed.
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://veronica.local",
+            "X-Title": title
+        }
+        payload = {
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature
+        }
+
+        remaining, bypass = self.candidates(models)
+        pending = {}
+        last_error = None
+
+        def launch():
+            # Admission is claimed only when a request is really sent, so a half-open
+            # model gets exactly one probe however many callers are racing for it
+            while remaining:
+                model = remaining.pop(0)
+                if bypass or self._stats(model).admit():
+                    pending[asyncio.create_task(self._post(model, payload, headers))] = model
+                    return model
+            return None
+
+        try:
+            current = launch()
+            while pending:
+                hedge_after = self.hedge_delay(current) if self.hedge and remaining else None
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    current = launch() or current
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+
+                if remaining and not pending:
+                    current = launch() or current
+        finally:
+            # Losing hedges are cancelled so they release their pooled connection
+            for task in pending:
+                task.cancel()
+
+        raise last_error or RuntimeError("No LLM models configured.")
+
+llm_client = LLMClient()
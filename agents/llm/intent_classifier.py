@@ -1,17 +1,12 @@
-import requests
-import os
 import json
-from dotenv import load_dotenv
+from agents.llm.client import llm_client
 
-load_dotenv()
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-
-def classify_intent(transcript: str) -> dict:
+async def classify_intent(transcript: str) -> dict:
     prompt = f"""
 You are an intent classification agent for a financial assistant.
 
 Given a user's query, identify **all relevant intents** from this list:
+- price_quote (only the current price is asked for)
 - stock_lookup
 - earnings_summary
 - sentiment_analysis
@@ -37,29 +32,8 @@ Respond ONLY with a valid JSON object in the format:
 Transcript: "{transcript}"
 """
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "HTTP-Referer": "https://veronica.local",
-        "X-Title": "veronica-agent"
-    }
-
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json={
-                "model": "mistralai/devstral-small:free",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.2
-            },
-            timeout=15
-        )
-
-        data = response.json()
-        if "choices" not in data or not data["choices"]:
-            raise ValueError(f"OpenRouter error: {data}")
-
-        content = data["choices"][0]["message"]["content"].strip()
+        content = (await llm_client.complete(prompt, temperature=0.2, title="veronica-agent")).strip()
 
         parsed = json.loads(content)
 
@@ -1,10 +1,8 @@
-import os
-import requests
-from dotenv import load_dotenv
+from utils.scheduler import scheduler
+from utils.profiling import stage
 from agents.retriever.faiss_index import query_faiss_index
-
-load_dotenv()
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+from agents.analytics.options import format_option_summary
+from agents.llm.client import llm_client
 
 def build_rag_prompt(query: str, retrieved_chunks: list, metadata: dict = None) -> str:
     context = "\n---\n".join([chunk["text"] for chunk in retrieved_chunks])
@@ -28,12 +26,22 @@ def build_rag_prompt(query: str, retrieved_chunks: list, metadata: dict = None)
                 for i, s in enumerate(mcp["news_sentiment"][:3], 1):
                     sentiment_block += f"{i}. \"{s['text'][:120]}...\" → **{s['sentiment']}**\n"
 
+            option_block = ""
+            if options := format_option_summary(mcp.get("option_summary")):
+                option_block = f"\nOptions Summary:\n{options}\n"
+
             other_data = "\n".join(
                 f"{k}: {str(v)[:500]}" for k, v in mcp.items()
-                if k != "news_sentiment" and v
+                if k not in ("news_sentiment", "option_summary") and v
             )
 
-            extra_info += f"\n\nStructured Market Info:\n{sentiment_block}\n{other_data}"
+            extra_info += f"\n\nStructured Market Info:\n{sentiment_block}{option_block}\n{other_data}"
+
+        if pending := metadata.get("pending"):
+            extra_info += (
+                f"\n\nData not yet available (still loading): {', '.join(k.replace('_', ' ') for k in pending)}. "
+                "Base the briefing on the data above and briefly note that these parts could not be included."
+            )
 
 
     prompt = f"""
@@ -64,29 +72,24 @@ Provide a brief but insightful summary of the financial status or key insights r
 """
     return prompt.strip()
 
-def query_llm(prompt: str, model="mistralai/devstral-small:free") -> str:
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "HTTP-Referer": "https://veronica.local",
-        "X-Title": "veronica-rag-agent"
-    }
-
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3
-    }
-
+async def query_llm(prompt: str, model: str = None) -> str:
     try:
-        response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=20)
-        return response.json()["choices"][0]["message"]["content"]
+        with stage("llm"):
+            return await llm_client.complete(prompt, temperature=0.3, models=[model] if model else None)
     except Exception as e:
         return f"LLM Error: {e}"
 
-def run_rag_pipeline(query: str, top_k: int = 5, metadata: dict = None) -> str:
-    retrieved = query_faiss_index(query, top_k=top_k)
+async def run_rag_pipeline(query: str, top_k: int = 5, metadata: dict = None, index=None) -> str:
+    """
+    Retrieves from the given index (a Session or a per-request ChunkIndex), or from
+    the offline index on disk when none is given
+    """
+    if index is not None:
+        retrieved = await scheduler.run("faiss", index.search, query, top_k)
+    else:
+        retrieved = await scheduler.run("faiss", query_faiss_index, query, top_k)
     if not retrieved:
         return "No relevant information found from MCP data."
 
     prompt = build_rag_prompt(query, retrieved, metadata=metadata)
-    return query_llm(prompt)
\ No newline at end of file
+    return await query_llm(prompt)
\ No newline at end of file
@@ -1,14 +1,75 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+import numpy as np
 from typing import List, Dict
+from agents.serving.client import MODEL_SERVER_SOCKET, remote_embed
+from utils.batching import MicroBatcher
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime, see onnx_embedder.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+_model = None
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def embedding_model_id() -> str:
+    """
+    Identifies the vectors this process produces; vectors from different models or
+    backends must never share an index
+    """
+    return f"{MODEL_NAME}:{'onnx-int8' if EMBEDDING_BACKEND == 'onnx' else 'torch'}"
+
+def get_model():
+    """
+    Loads the embedding model on first use so processes that delegate to the model
+    server never hold a copy
+    """
+    global _model
+    if _model is None:
+        if EMBEDDING_BACKEND == "onnx":
+            from agents.retriever.onnx_embedder import OnnxEmbedder
+            _model = OnnxEmbedder()
+        else:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+def encode_local(texts: List[str]) -> np.ndarray:
+    """
+    One forward pass over texts with the configured backend. No progress bar: the
+    texts of several requests are often merged into one call here.
+    """
+    if EMBEDDING_BACKEND == "onnx":
+        return get_model().encode(texts)
+    return get_model().encode(texts, show_progress_bar=False, convert_to_numpy=True)
+
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(encode_local, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS)
+    return _batcher
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embeds texts with MiniLM, on the shared model server when MODEL_SERVER_SOCKET is set.
+    With the ONNX backend, concurrent calls are merged into shared forward passes.
+    """
+    if MODEL_SERVER_SOCKET:
+        return remote_embed(texts)
+    if EMBEDDING_BACKEND == "onnx":
+        return get_batcher().submit(texts)
+    return encode_local(texts)
 
 def embed_chunks(chunks: List[Dict]) -> List[Dict]:
     """
     Adds vector embeddings to each chunk using MiniLM and preserves metadata
     """
     texts = [chunk["text"] for chunk in chunks]
-    embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+    embeddings = encode_texts(texts)
 
     embedded_chunks = []
     for chunk, embedding in zip(chunks, embeddings):
@@ -22,4 +83,4 @@ def embed_chunks(chunks: List[Dict]) -> List[Dict]:
         })
 
     print(f"Embedded {len(embedded_chunks)} chunks from MCP data.")
-    return embedded_chunks
\ No newline at end of file
+    return embedded_chunks
@@ -3,17 +3,43 @@ import numpy as np
 import pickle
 from pathlib import Path
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+from agents.retriever.embedder import encode_texts
 
 INDEX_PATH = Path("data/vector_index/faiss.index")
 META_PATH = Path("data/vector_index/meta.pkl")
 INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+def _chunk_meta(chunk: Dict) -> Dict:
+    return {
+        "chunk_id": chunk["chunk_id"],
+        "text": chunk["text"],
+        "source": chunk.get("source", ""),
+        "ticker": chunk.get("ticker", ""),
+        "intent_tags": chunk.get("intent_tags", [])
+    }
+
+class ChunkIndex:
+    """
+    In-memory FAISS index over one request's chunks. Used on the request path so
+    concurrent requests never share (or overwrite) an index.
+    """
+    def __init__(self, embedded_chunks: List[Dict], dim: int = 384):
+        self.index = faiss.IndexFlatL2(dim)
+        self.meta = [_chunk_meta(c) for c in embedded_chunks]
+        if embedded_chunks:
+            self.index.add(np.array([c["embedding"] for c in embedded_chunks], dtype=np.float32))
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        if self.index.ntotal == 0:
+            return []
+        query_vec = np.asarray(encode_texts([query]), dtype=np.float32)
+        _, I = self.index.search(query_vec, min(top_k, self.index.ntotal))
+        return [self.meta[i] for i in I[0] if 0 <= i < len(self.meta)]
 
 def build_faiss_index(embedded_chunks: List[Dict], dim: int = 384):
     """
-    Builds a FAISS index from embedded MCP chunks and saves both vectors and metadata
+    Builds a FAISS index from embedded chunks and saves both vectors and metadata
+    to disk, for offline corpora (scripts/build_faiss.py)
     """
     if not embedded_chunks:
         print("No embedded chunks available — skipping FAISS index build.")
@@ -26,13 +52,7 @@ def build_faiss_index(embedded_chunks: List[Dict], dim: int = 384):
     faiss.write_index(index, str(INDEX_PATH))
     print(f"FAISS index saved to {INDEX_PATH}")
 
-    meta = [{
-        "chunk_id": c["chunk_id"],
-        "text": c["text"],
-        "source": c.get("source", ""),
-        "ticker": c.get("ticker", ""),
-        "intent_tags": c.get("intent_tags", [])
-    } for c in embedded_chunks]
+    meta = [_chunk_meta(c) for c in embedded_chunks]
 
     with open(META_PATH, "wb") as f:
         pickle.dump(meta, f)
@@ -49,7 +69,7 @@ def query_faiss_index(query: str, top_k: int = 5) -> List[Dict]:
     Embeds the query, retrieves top-k relevant chunks from the FAISS index
     """
     index, meta = load_faiss_index()
-    query_vec = model.encode([query])
+    query_vec = encode_texts([query])
     D, I = index.search(np.array(query_vec), top_k)
 
     results = []
@@ -38,7 +38,7 @@ def load_and_chunk_mcp_data(mcp_data: Dict) -> List[Dict]:
 
         try:
             if isinstance(value, (dict, list)):
-                value_str = json.dumps(value, indent=2)
+                value_str = json.dumps(value, indent=2, default=str)
             else:
                 value_str = str(value)
 
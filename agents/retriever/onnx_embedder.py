@@ -0,0 +1,73 @@
+"""
+Int8-quantised ONNX Runtime MiniLM, selected with EMBEDDING_BACKEND=onnx.
+
+The model directory is produced by scripts/export_onnx_embedder.py and holds
+model.onnx plus the tokenizer.json of all-MiniLM-L6-v2. onnxruntime and tokenizers
+are optional dependencies, imported only when this backend is used.
+"""
+import os
+from pathlib import Path
+from typing import List
+import numpy as np
+
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "data/models/minilm-onnx-int8"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+MAX_SEQ_LENGTH = 256
+EMBEDDING_DIM = 384
+
+class OnnxEmbedder:
+    """
+    MiniLM forward pass in ONNX Runtime followed by the same mean pooling and L2
+    normalisation as the sentence-transformers pipeline
+    """
+    def __init__(self, model_dir: Path = ONNX_MODEL_DIR, encode_batch: int = 32):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        if not (model_dir / "model.onnx").exists():
+            raise FileNotFoundError(
+                f"No ONNX embedder in {model_dir}; run `python -m scripts.export_onnx_embedder` first."
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(
+            str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        self.encode_batch = encode_batch
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds texts in length-sorted sub-batches so short texts are not padded to
+        the longest one in the call
+        """
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        order = np.argsort([len(t) for t in texts])
+        vectors = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for start in range(0, len(texts), self.encode_batch):
+            idx = order[start:start + self.encode_batch]
+            vectors[idx] = self._forward([texts[i] for i in idx])
+        return vectors
@@ -0,0 +1,186 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+import faiss
+import numpy as np
+import orjson
+from agents.retriever.embedder import encode_texts
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+EMBEDDING_DIM = 384
+
+# Datasets whose content depends on the requested time frame
+TIME_FRAME_DATASETS = {"historical_prices"}
+
+def dataset_signature(key: str, time_frame: str) -> str | None:
+    return time_frame if key in TIME_FRAME_DATASETS else None
+
+def _nbytes(value) -> int:
+    try:
+        return len(orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+    except Exception:
+        return len(str(value))
+
+class Session:
+    """
+    Conversation state: the MCP datasets fetched so far per ticker, their chunk
+    embeddings and a session-local FAISS index that only ever grows by the datasets
+    added since the last question (or shrinks when a dataset is replaced).
+
+    Searches run in worker threads while datasets are added and replaced on the
+    event loop, so every index access goes through index_lock.
+    """
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.datasets = {}      # ticker -> {key: value}
+        self.signatures = {}    # (ticker, key) -> signature the dataset was fetched with
+        self.fetched_at = {}    # (ticker, key) -> monotonic time the dataset was last stored
+        self.intents = {}       # ticker -> intents seen so far
+        self.index = faiss.IndexIDMap(faiss.IndexFlatL2(EMBEDDING_DIM))
+        self.index_lock = threading.Lock()
+        self.meta = {}          # vector id -> chunk metadata
+        self.vector_ids = {}    # (ticker, key) -> vector ids, present once embedded
+        self.dataset_bytes = {}
+        self._nbytes = 0        # running total, so eviction never re-walks the chunks
+        self.next_id = 0
+        self.last_access = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @staticmethod
+    def _vector_bytes(meta: dict) -> int:
+        return len(meta["text"]) + EMBEDDING_DIM * 4
+
+    def missing(self, ticker: str, keys: list, time_frame: str = "", ttl=None) -> list:
+        """
+        Dataset keys for the ticker that are absent, failed last time, were fetched
+        for another time frame, or are older than ttl(key) seconds
+        """
+        stored = self.datasets.get(ticker, {})
+        now = time.monotonic()
+        return [
+            key for key in keys
+            if key not in stored
+            or (isinstance(stored[key], dict) and "error" in stored[key])
+            or self.signatures.get((ticker, key)) != dataset_signature(key, time_frame)
+            or (ttl is not None and now - self.fetched_at.get((ticker, key), 0) >= ttl(key))
+        ]
+
+    def add_datasets(self, ticker: str, intents: list, data: dict, time_frame: str = ""):
+        stored = self.datasets.setdefault(ticker, {})
+        self.intents[ticker] = list(dict.fromkeys(self.intents.get(ticker, []) + list(intents)))
+
+        for key, value in data.items():
+            signature = dataset_signature(key, time_frame)
+            self.fetched_at[(ticker, key)] = time.monotonic()
+            if key in stored and self.signatures.get((ticker, key)) == signature and stored[key] == value:
+                continue
+            if key in stored:
+                self._drop_vectors(ticker, key)
+            stored[key] = value
+            self.signatures[(ticker, key)] = signature
+            size = _nbytes(value)
+            self._nbytes += size - self.dataset_bytes.get((ticker, key), 0)
+            self.dataset_bytes[(ticker, key)] = size
+
+    def _drop_vectors(self, ticker: str, key: str):
+        ids = self.vector_ids.pop((ticker, key), [])
+        if ids:
+            with self.index_lock:
+                self.index.remove_ids(np.array(ids, dtype=np.int64))
+                for vector_id in ids:
+                    if (meta := self.meta.pop(vector_id, None)) is not None:
+                        self._nbytes -= self._vector_bytes(meta)
+
+    def pending_datasets(self) -> Dict[str, Dict]:
+        """
+        Datasets per ticker that have not been embedded into the index yet
+        """
+        pending = {}
+        for ticker, stored in self.datasets.items():
+            data = {k: v for k, v in stored.items() if (ticker, k) not in self.vector_ids}
+            if data:
+                pending[ticker] = data
+        return pending
+
+    def add_embedded(self, embedded_chunks: List[Dict]):
+        if not embedded_chunks:
+            return
+
+        ids = np.arange(self.next_id, self.next_id + len(embedded_chunks), dtype=np.int64)
+        self.next_id += len(embedded_chunks)
+        vectors = np.array([c["embedding"] for c in embedded_chunks], dtype=np.float32)
+        with self.index_lock:
+            self.index.add_with_ids(vectors, ids)
+
+        for vector_id, chunk in zip(ids.tolist(), embedded_chunks):
+            self.meta[vector_id] = {
+                "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"],
+                "source": chunk.get("source", ""),
+                "ticker": chunk.get("ticker", ""),
+                "intent_tags": chunk.get("intent_tags", [])
+            }
+            self.vector_ids.setdefault((chunk.get("ticker", ""), chunk.get("source", "")), []).append(vector_id)
+            self._nbytes += self._vector_bytes(self.meta[vector_id])
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        if self.index.ntotal == 0:
+            return []
+        query_vec = np.asarray(encode_texts([query]), dtype=np.float32)
+        with self.index_lock:
+            if self.index.ntotal == 0:
+                return []
+            _, I = self.index.search(query_vec, min(top_k, self.index.ntotal))
+            return [self.meta[i] for i in I[0] if i in self.meta]
+
+class SessionStore:
+    """
+    In-memory sessions with idle TTL and LRU eviction once SESSION_MAX_BYTES is exceeded
+    """
+    def __init__(self, ttl: float = SESSION_TTL, max_bytes: int = SESSION_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+
+    def get(self, session_id: str | None) -> Session | None:
+        if not session_id:
+            return None
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.monotonic() - session.last_access > self.ttl:
+            self._sessions.pop(session_id, None)
+            return None
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def create(self) -> Session:
+        session = Session(uuid.uuid4().hex)
+        self._sessions[session.id] = session
+        self.evict()
+        return session
+
+    def get_or_create(self, session_id: str | None) -> Session:
+        return self.get(session_id) or self.create()
+
+    def evict(self):
+        now = time.monotonic()
+        for session_id in [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl]:
+            self._sessions.pop(session_id, None)
+
+        total = sum(s.nbytes for s in self._sessions.values())
+        while total > self.max_bytes and len(self._sessions) > 1:
+            _, oldest = self._sessions.popitem(last=False)
+            total -= oldest.nbytes
+
+session_store = SessionStore()
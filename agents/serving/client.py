@@ -0,0 +1,30 @@
+import os
+import json
+import socket
+import numpy as np
+from agents.serving.protocol import pack_frame, recv_frame
+
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET")
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", "120"))
+
+def _request(header: dict, payload: bytes = b"") -> tuple[dict, bytes]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(MODEL_SERVER_TIMEOUT)
+        sock.connect(MODEL_SERVER_SOCKET)
+        sock.sendall(pack_frame(header, payload))
+        reply, body = recv_frame(sock)
+
+    if not reply.get("ok"):
+        raise RuntimeError(f"Model server error: {reply.get('error')}")
+    return reply, body
+
+def remote_embed(texts: list) -> np.ndarray:
+    """
+    Embeds texts on the shared model server; blocking, so call it from a worker thread
+    """
+    reply, body = _request({"op": "embed"}, json.dumps(texts).encode())
+    return np.frombuffer(body, dtype=reply["dtype"]).reshape(reply["shape"])
+
+def remote_transcribe(audio_bytes: bytes) -> str:
+    _, body = _request({"op": "transcribe"}, audio_bytes)
+    return body.decode()
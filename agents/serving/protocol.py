@@ -0,0 +1,39 @@
+import json
+import socket
+import struct
+
+# Frame: [4-byte header length][JSON header][4-byte payload length][payload bytes]
+_LEN = struct.Struct(">I")
+
+def pack_frame(header: dict, payload: bytes = b"") -> bytes:
+    head = json.dumps(header).encode()
+    return _LEN.pack(len(head)) + head + _LEN.pack(len(payload)) + payload
+
+async def read_frame(reader) -> tuple[dict, bytes]:
+    """
+    Reads one frame from an asyncio StreamReader
+    """
+    head_len, = _LEN.unpack(await reader.readexactly(_LEN.size))
+    header = json.loads(await reader.readexactly(head_len))
+    payload_len, = _LEN.unpack(await reader.readexactly(_LEN.size))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Model server closed the connection.")
+        buf += chunk
+    return bytes(buf)
+
+def recv_frame(sock: socket.socket) -> tuple[dict, bytes]:
+    """
+    Reads one frame from a blocking socket
+    """
+    head_len, = _LEN.unpack(_recv_exactly(sock, _LEN.size))
+    header = json.loads(_recv_exactly(sock, head_len))
+    payload_len, = _LEN.unpack(_recv_exactly(sock, _LEN.size))
+    payload = _recv_exactly(sock, payload_len) if payload_len else b""
+    return header, payload
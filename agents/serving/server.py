@@ -0,0 +1,79 @@
+"""
+Shared model server: hosts Whisper and MiniLM once per machine so that uvicorn
+workers started with MODEL_SERVER_SOCKET set hold no model weights themselves.
+
+Run with:
+    python -m agents.serving.server [socket_path]
+"""
+import os
+import sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.batching import MicroBatcher
+from agents.retriever.embedder import (
+    encode_local,
+    get_model as get_embedding_model,
+    EMBED_MAX_BATCH,
+    EMBED_MAX_WAIT_MS
+)
+from agents.voice.stt import transcribe_local, get_model as get_whisper_model, STT_WORKERS
+from agents.serving.protocol import pack_frame, read_frame
+
+DEFAULT_SOCKET = "/tmp/veronica-models.sock"
+
+class ModelServer:
+    def __init__(self):
+        self.stt_executor = ThreadPoolExecutor(max_workers=STT_WORKERS, thread_name_prefix="stt")
+        # Requests from every worker are merged into shared forward passes on one thread
+        self.batcher = MicroBatcher(encode_local, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header, payload = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    reply, body = await self.dispatch(header, payload)
+                except Exception as e:
+                    reply, body = {"ok": False, "error": str(e)}, b""
+
+                writer.write(pack_frame(reply, body))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def dispatch(self, header: dict, payload: bytes) -> tuple[dict, bytes]:
+        match header.get("op"):
+            case "embed":
+                texts = json.loads(payload)
+                vectors = np.ascontiguousarray(await self.batcher.submit_async(texts), dtype=np.float32)
+                return {"ok": True, "shape": list(vectors.shape), "dtype": "float32"}, vectors.tobytes()
+            case "transcribe":
+                loop = asyncio.get_running_loop()
+                transcript = await loop.run_in_executor(self.stt_executor, transcribe_local, payload)
+                return {"ok": True}, transcript.encode()
+            case "ping":
+                return {"ok": True}, b""
+            case op:
+                return {"ok": False, "error": f"Unknown op: {op}"}, b""
+
+    async def serve(self, socket_path: str):
+        get_embedding_model()
+        get_whisper_model()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        print(f"Model server listening on {socket_path}")
+        async with server:
+            await server.serve_forever()
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("MODEL_SERVER_SOCKET", DEFAULT_SOCKET)
+    asyncio.run(ModelServer().serve(path))
@@ -1,16 +1,29 @@
-from faster_whisper import WhisperModel
 import tempfile
 import os
+from agents.serving.client import MODEL_SERVER_SOCKET, remote_transcribe
 
-model = WhisperModel("base", device="cpu", compute_type="int8")  # use "tiny" if resources are low
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")  # use "tiny" if resources are low
+STT_WORKERS = int(os.getenv("STT_WORKERS", "1"))
 
-def transcribe_audio(audio_bytes: bytes) -> str:
+_model = None
+
+def get_model():
+    """
+    Loads Whisper on first use so processes that delegate to the model server never hold a copy
+    """
+    global _model
+    if _model is None:
+        from faster_whisper import WhisperModel
+        _model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8", num_workers=STT_WORKERS)
+    return _model
+
+def transcribe_local(audio_bytes: bytes) -> str:
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
         temp_audio.write(audio_bytes)
         temp_path = temp_audio.name
 
     try:
-        segments, _ = model.transcribe(temp_path)
+        segments, _ = get_model().transcribe(temp_path)
         transcript = " ".join([segment.text for segment in segments])
     except Exception as e:
         transcript = f"Transcription failed: {e}"
@@ -18,3 +31,11 @@ def transcribe_audio(audio_bytes: bytes) -> str:
         os.remove(temp_path)
 
     return transcript
+
+def transcribe_audio(audio_bytes: bytes) -> str:
+    if MODEL_SERVER_SOCKET:
+        try:
+            return remote_transcribe(audio_bytes)
+        except Exception as e:
+            return f"Transcription failed: {e}"
+    return transcribe_local(audio_bytes)
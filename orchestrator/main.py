@@ -1,28 +1,52 @@
+import os
+import math
+import asyncio
+from contextlib import asynccontextmanager
+import orjson
 from fastapi import FastAPI, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from agents.analytics.sentiment import analyze_sentiment_finbert
-from agents.voice.stt import transcribe_audio
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from agents.voice.stt import transcribe_audio, get_model as get_whisper_model
 from agents.llm.intent_classifier import classify_intent
 from agents.llm.rag_pipeline import run_rag_pipeline
-from agents.retriever.loader import load_and_chunk_mcp_data
-from agents.retriever.embedder import embed_chunks
-from agents.retriever.faiss_index import build_faiss_index
+from agents.retriever.embedder import get_model as get_embedding_model
+from agents.retriever.faiss_index import ChunkIndex
 from agents.api.main import get_stock_data
 from fastapi import Body
-from agents.api.yfinance_client import (
-    get_historical_stock_prices_yf,
-    get_stock_info_yf,
-    get_yahoo_finance_news_yf,
-    get_stock_actions_yf,
-    get_financial_statement_yf,
-    get_holder_info_yf,
-    get_option_expiration_dates_yf,
-    get_option_chain_yf,
-    get_recommendations_yf
+from agents.api.symbol_master import symbol_master
+from agents.api.quotes import get_quotes, format_quote, QUOTE_MAX_SYMBOLS
+from orchestrator.mcp import (
+    collect_ticker_data,
+    dataset_keys,
+    dataset_ttl,
+    embed_datasets,
+    quote_only,
+    latency_budget,
+    is_pending
 )
+from agents.retriever.session_store import session_store
 from agents.voice.tts import speak_text
-
-app = FastAPI()
+from agents.serving.client import MODEL_SERVER_SOCKET
+from utils.http import start_http_client, close_http_client
+from utils.profiling import ProfilingMiddleware, stage
+from utils.compression import CompressionMiddleware
+from utils.payload import shape, decode_datasets, validate_options
+from utils.scheduler import scheduler, Overloaded, current_priority, start_deadline, BATCH
+
+MCP_BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
+MCP_BATCH_MAX_TICKERS = int(os.getenv("MCP_BATCH_MAX_TICKERS", "50"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    if not MODEL_SERVER_SOCKET:
+        # Load in-process models up front rather than on the first request
+        await asyncio.to_thread(get_embedding_model)
+        await asyncio.to_thread(get_whisper_model)
+    yield
+    await close_http_client()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +55,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return ORJSONResponse(
+        status_code=503,
+        content={"error": str(exc), "stage": exc.stage, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
 
 @app.get("/")
 def root():
@@ -39,22 +73,58 @@ def root():
 @app.post("/transcribe/")
 async def transcribe(file: UploadFile = File(...)):
     audio_bytes = await file.read()
-    transcript = transcribe_audio(audio_bytes)
-    intent_result = classify_intent(transcript)
+    transcript = await scheduler.run("stt", transcribe_audio, audio_bytes)
+    with stage("intent"):
+        intent_result = await classify_intent(transcript)
 
     tickers = intent_result.get("tickers", [])
     if isinstance(tickers, str):
         tickers = [tickers]
-    intent_result["tickers"] = tickers
+    # The LLM often returns company names ("Apple"); map them to tickers locally
+    intent_result["tickers"] = symbol_master.resolve(tickers)
 
     return {
         "transcript": transcript,
         "intent": intent_result
     }
 
+@app.get("/symbols/lookup")
+def lookup_symbol(q: str = ""):
+    """
+    Resolves a ticker, ISIN or (fuzzy) company name against the local symbol master
+    """
+    record = symbol_master.lookup(q)
+    if record is None:
+        return {"error": f"No symbol found for '{q}'."}
+    return record
+
+@app.post("/symbols/reload")
+async def reload_symbols():
+    """
+    Re-reads the symbol master file (SYMBOL_MASTER_PATH) without a restart
+    """
+    count = await asyncio.to_thread(symbol_master.reload)
+    return {"symbols": count, "path": str(symbol_master.path)}
+
+@app.get("/quote")
+async def quote(symbols: str = ""):
+    """
+    Latest price snapshots for a comma-separated list of symbols, served from a
+    short-TTL table shared by all requests
+    """
+    requested = [s for s in symbols.split(",") if s.strip()]
+    if not requested:
+        return {"error": "No symbols provided."}
+    if len(requested) > QUOTE_MAX_SYMBOLS:
+        return {"error": f"At most {QUOTE_MAX_SYMBOLS} symbols per request."}
+
+    return ORJSONResponse({"quotes": await get_quotes(requested)})
+
 @app.post("/mcp/")
 async def run_mcp_actions(request: Request):
     body = await request.json()
+    if (error := validate_options(body)) is not None:
+        return ORJSONResponse({"error": error}, status_code=400)
     intent_data = body.get("intent", {})
 
     intents = intent_data.get("intents", [])
@@ -80,75 +150,88 @@ async def run_mcp_actions(request: Request):
     if not ticker:
         return {"error": "Ticker symbol is required."}
 
-    result = {}
+    # Datasets not ready within the budget are reported as pending and keep loading
+    # in the background; the session does not store them, so the next call picks
+    # them up from the cache
+    budget = latency_budget(body.get("budget_ms", request.headers.get("x-latency-budget-ms")))
+    start_deadline(budget)
+
+    # Follow-ups in the same session only fetch the datasets it does not hold yet
+    session = session_store.get_or_create(body.get("session_id"))
+    missing = session.missing(ticker, dataset_keys(intents), time_frame, ttl=dataset_ttl)
+    if body.get("datasets"):
+        # Projected requests only fetch what they will return
+        missing = [key for key in missing if key in body["datasets"]]
+    pending = []
+    if missing:
+        with stage("mcp_fetch"):
+            fetched = await collect_ticker_data(ticker, intents, time_frame, only=missing, budget=budget)
+        pending = [key for key, value in fetched.items() if is_pending(value)]
+        ready = {key: value for key, value in fetched.items() if key not in pending}
+        session.add_datasets(ticker, intents, ready, time_frame)
+        session_store.evict()
+
+    # Returned directly so the payload is encoded once by orjson instead of
+    # going through jsonable_encoder first
+    return ORJSONResponse({
+        "ticker": ticker,
+        "intents": intents,
+        "session_id": session.id,
+        # Projection builds new containers, so session and cached values are never mutated
+        "data": shape(session.datasets.get(ticker, {}), body),
+        "pending": pending
+    })
+
+@app.post("/mcp/batch")
+async def run_mcp_batch(request: Request):
+    """
+    Runs the MCP fetch for a watchlist and streams one NDJSON record per ticker,
+    in completion order; each record has the same shape as a /mcp/ response
+    """
+    body = await request.json()
+    if (error := validate_options(body)) is not None:
+        return ORJSONResponse({"error": error}, status_code=400)
+    intent_data = body.get("intent", {})
 
-    result["news_summary"] = await get_yahoo_finance_news_yf(ticker)
+    intents = intent_data.get("intents", [])
+    tickers = intent_data.get("tickers", [])
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    tickers = list(dict.fromkeys(t for t in tickers if t))
+    time_frame = intent_data.get("time_frame", "1mo")
 
-    result["news_sentiment"] = []
-    for article in result["news_summary"][:4]:
-        if isinstance(article, dict):
-            title = article.get("Title", "")
-            summary = article.get("Summary", "")
-            description = article.get("Description", "")
-            text = f"{title}. {summary} {description}".strip()
-        else:
-            text = str(article)
-
-        if text:
-            sentiment = analyze_sentiment_finbert(text)
-            result["news_sentiment"].append({
-                "text": text,
-                "sentiment": sentiment
-            })
-
-    for intent in intents:
-        if intent == "stock_lookup":
-            result["historical_prices"] = await get_historical_stock_prices_yf(ticker, time_frame)
-            result["stock_info"] = await get_stock_info_yf(ticker)
-            result["stock_actions"] = await get_stock_actions_yf(ticker)
-
-        elif intent == "earnings_summary":
-            result["financials"] = await get_financial_statement_yf(ticker, "income_stmt")
-            result["recommendations"] = await get_recommendations_yf(ticker, "recommendations")
-
-        elif intent == "sentiment_analysis":
-            result["recommendations"] = await get_recommendations_yf(ticker, "upgrades_downgrades")
-
-        elif intent == "risk_exposure":
-            result["balance_sheet"] = await get_financial_statement_yf(ticker, "balance_sheet")
-            result["cashflow"] = await get_financial_statement_yf(ticker, "cashflow")
-
-        elif intent == "holder_analysis":
-            result["institutional_holders"] = await get_holder_info_yf(ticker, "institutional_holders")
-            result["insider_transactions"] = await get_holder_info_yf(ticker, "insider_transactions")
-
-        elif intent == "option_insight":
-            dates = await get_option_expiration_dates_yf(ticker)
-            try:
-                dates_list = eval(dates) if isinstance(dates, str) else dates
-                first_date = dates_list[0] if dates_list else ""
-                if first_date:
-                    result["option_chain_calls"] = await get_option_chain_yf(ticker, first_date, "calls")
-                    result["option_chain_puts"] = await get_option_chain_yf(ticker, first_date, "puts")
-            except Exception as e:
-                result["option_error"] = str(e)
+    if not tickers:
+        return {"error": "No ticker provided."}
 
-        elif intent == "financials":
-            result["income_stmt"] = await get_financial_statement_yf(ticker, "income_stmt")
-            result["balance_sheet"] = await get_financial_statement_yf(ticker, "balance_sheet")
-            result["cashflow"] = await get_financial_statement_yf(ticker, "cashflow")
+    if len(tickers) > MCP_BATCH_MAX_TICKERS:
+        return {"error": f"At most {MCP_BATCH_MAX_TICKERS} tickers per batch."}
 
-        elif intent == "news_summary":
-            pass
+    slots = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+    # Projected requests only fetch what they will return, as in /mcp/
+    only = [key for key in dataset_keys(intents) if key in body["datasets"]] if body.get("datasets") else None
 
-        else:
-            result[f"{intent}_error"] = f"Unknown intent: {intent}"
+    async def run(ticker: str) -> dict:
+        # Watchlist work queues behind interactive requests on the shared stages
+        current_priority.set(BATCH)
+        async with slots:
+            try:
+                data = await collect_ticker_data(ticker, intents, time_frame, only=only)
+                return {"ticker": ticker, "intents": intents, "data": shape(data, body)}
+            except Exception as e:
+                return {"ticker": ticker, "intents": intents, "error": str(e)}
 
-    return {
-        "ticker": ticker,
-        "intents": intents,
-        "data": result
-    }
+    async def stream():
+        tasks = [asyncio.create_task(run(ticker)) for ticker in tickers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                yield orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) + b"\n"
+        finally:
+            # Client went away mid-stream: stop fetching the rest of the watchlist
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 @app.post("/answer/")
 async def answer(request: Request):
@@ -156,6 +239,9 @@ async def answer(request: Request):
     intent = body.get("intent", {})
     transcript = body.get("transcript", "")
     mcp_data = body.get("mcp_data", {})
+    if isinstance(mcp_data.get("data"), dict):
+        # Tables may come back column-wise, as /mcp/ sent them
+        mcp_data = {**mcp_data, "data": decode_datasets(mcp_data["data"])}
 
     tickers = intent.get("tickers", [])
     if isinstance(tickers, str):
@@ -163,11 +249,31 @@ async def answer(request: Request):
 
     intents = intent.get("intents", [])
 
+    # Only an explicit budget bounds /answer/; embedding and search that cannot
+    # start in time are shed with a 503 instead of answering late
+    budget_ms = body.get("budget_ms", request.headers.get("x-latency-budget-ms"))
+    start_deadline(latency_budget(budget_ms, default_ms=0))
+
+    if quote_only(intents) and tickers:
+        # Price-only questions are answered from the quote snapshots, without RAG
+        with stage("quote"):
+            quotes = await get_quotes(tickers)
+        quote_answer = " ".join(format_quote(q) for q in quotes.values())
+        with stage("tts"):
+            audio_path = await asyncio.to_thread(speak_text, quote_answer)
+
+        return {
+            "query": transcript,
+            "answer": quote_answer,
+            "audio_path": audio_path,
+            "mode": "quote"
+        }
+
     if "unknown" in intents or len(tickers) > 1:
         from agents.fallback.fallback_summary import run_fallback_summary
         time_frame = intent.get("time_frame", "1mo")
         fallback_answer = await run_fallback_summary(tickers, time_frame)
-        audio_path = speak_text(fallback_answer)
+        audio_path = await asyncio.to_thread(speak_text, fallback_answer)
 
         return {
             "query": transcript,
@@ -180,15 +286,54 @@ async def answer(request: Request):
     time_frame = intent.get("time_frame", "")
     region = intent.get("region", "")
 
-    if not mcp_data or not mcp_data.get("data"):
+    session = session_store.get(body.get("session_id"))
+    if session is not None and mcp_data.get("data"):
+        ticker = mcp_data.get("ticker") or (tickers[0] if tickers else "UNKNOWN")
+        # The session's own copies win over echoed ones, which may be projected or downsampled
+        stored = session.datasets.get(ticker, {})
+        echoed = {key: value for key, value in mcp_data["data"].items() if key not in stored}
+        session.add_datasets(ticker, mcp_data.get("intents", []), echoed, time_frame)
+
+    pending = list(mcp_data.get("pending", []))
+    if session is not None:
+        # /mcp/ keeps only what finished within its budget and clients send just the
+        # session id, so datasets it reported as pending (or that went stale) are
+        # collected here, from the caches or the background fetch still running
+        fetch_frame = intent.get("time_frame") or "1mo"
+        for ticker in list(session.datasets):
+            ticker_intents = session.intents.get(ticker, [])
+            missing = session.missing(ticker, dataset_keys(ticker_intents), fetch_frame, ttl=dataset_ttl)
+            if not missing:
+                continue
+            with stage("mcp_fetch"):
+                fetched = await collect_ticker_data(
+                    ticker, ticker_intents, fetch_frame, only=missing, budget=latency_budget(budget_ms)
+                )
+            still_pending = [key for key, value in fetched.items() if is_pending(value)]
+            ready = {key: value for key, value in fetched.items() if key not in still_pending}
+            session.add_datasets(ticker, ticker_intents, ready, fetch_frame)
+            pending.extend(still_pending)
+        pending = list(dict.fromkeys(pending))
+
+    if session is not None and session.datasets:
+        # Only datasets added since the last question are chunked and embedded
+        async with session.lock:
+            for ticker, data in session.pending_datasets().items():
+                session.add_embedded(await embed_datasets(ticker, session.intents.get(ticker, []), data))
+        session_store.evict()
+        index = session
+    elif not mcp_data or not mcp_data.get("data"):
         return {
             "query": transcript,
             "answer": "MCP data missing — cannot run RAG pipeline."
-        }    
-
-    chunks = load_and_chunk_mcp_data(mcp_data)
-    embedded = embed_chunks(chunks)
-    build_faiss_index(embedded)
+        }
+    else:
+        session = None
+        embedded = await embed_datasets(
+            mcp_data.get("ticker", "UNKNOWN"), mcp_data.get("intents", []), mcp_data["data"]
+        )
+        # Built per request, never shared, so concurrent answers cannot see each other's chunks
+        index = await scheduler.run("faiss", ChunkIndex, embedded)
 
     query_parts = []
     if intent_type: query_parts.append(intent_type.replace("_", " "))
@@ -202,21 +347,32 @@ async def answer(request: Request):
 
     query_string = " ".join(query_parts) or transcript
 
-    mcp_data = body.get("mcp_data", {})
+    if session is not None:
+        ticker = tickers[0] if tickers else next(iter(session.datasets))
+        structured = session.datasets.get(ticker, {})
+    else:
+        structured = mcp_data.get("data", {})
+
     metadata = {
         "tickers": tickers if isinstance(tickers, list) else [tickers],
         "region": region,
         "time_frame": time_frame,
         "intents": [intent_type],
-        "mcp_data": mcp_data.get("data", {})
+        "mcp_data": structured,
+        "pending": pending
     }
 
-    rag_answer = run_rag_pipeline(query_string, metadata=metadata)
+    with stage("rag"):
+        rag_answer = await run_rag_pipeline(query_string, metadata=metadata, index=index)
     audio_path = "output_audio.wav"
-    tts_path = speak_text(rag_answer)
+    with stage("tts"):
+        tts_path = await asyncio.to_thread(speak_text, rag_answer)
 
-    return {
+    response = {
         "query": query_string,
         "answer": rag_answer,
         "audio_path": tts_path
-    }
\ No newline at end of file
+    }
+    if session is not None:
+        response["session_id"] = session.id
+    return response
\ No newline at end of file
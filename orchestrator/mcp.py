@@ -0,0 +1,227 @@
+import os
+import asyncio
+from typing import List, Dict
+from agents.analytics.options import get_option_summary_yf
+from agents.api.quotes import get_quote, QUOTE_TTL
+from agents.analytics.news_store import news_store, article_text, NEWS_REFRESH_TTL
+from agents.retriever.loader import load_and_chunk_mcp_data
+from agents.retriever.embedder import embed_chunks
+from utils.scheduler import scheduler
+from agents.api.yfinance_client import (
+    get_historical_stock_prices_yf,
+    get_stock_info_yf,
+    get_yahoo_finance_news_yf,
+    get_stock_actions_yf,
+    get_financial_statement_yf,
+    get_holder_info_yf,
+    get_recommendations_yf,
+    YF_CACHE_TTL
+)
+
+NEWS_LIMIT = int(os.getenv("NEWS_LIMIT", "10"))
+NEWS_SENTIMENT_ARTICLES = 4
+# Default /mcp/ latency budget; 0 waits for every dataset
+MCP_BUDGET_MS = float(os.getenv("MCP_BUDGET_MS", "4000"))
+
+# Fetches that outlived their request's budget, by (ticker, dataset key, time frame);
+# referenced here so they are not garbage collected while they finish and fill the
+# caches, and so a follow-up joins the running fetch instead of starting another
+_background = {}
+
+# intent -> {dataset key: fetcher(ticker, time_frame)}
+INTENT_DATASETS = {
+    "price_quote": {
+        "quote": lambda ticker, time_frame: get_quote(ticker),
+    },
+    "stock_lookup": {
+        "historical_prices": lambda ticker, time_frame: get_historical_stock_prices_yf(ticker, time_frame),
+        "stock_info": lambda ticker, time_frame: get_stock_info_yf(ticker),
+        "stock_actions": lambda ticker, time_frame: get_stock_actions_yf(ticker),
+    },
+    "earnings_summary": {
+        "financials": lambda ticker, time_frame: get_financial_statement_yf(ticker, "income_stmt"),
+        "recommendations": lambda ticker, time_frame: get_recommendations_yf(ticker, "recommendations"),
+    },
+    "sentiment_analysis": {
+        "upgrades_downgrades": lambda ticker, time_frame: get_recommendations_yf(ticker, "upgrades_downgrades"),
+    },
+    "risk_exposure": {
+        "balance_sheet": lambda ticker, time_frame: get_financial_statement_yf(ticker, "balance_sheet"),
+        "cashflow": lambda ticker, time_frame: get_financial_statement_yf(ticker, "cashflow"),
+    },
+    "holder_analysis": {
+        "institutional_holders": lambda ticker, time_frame: get_holder_info_yf(ticker, "institutional_holders"),
+        "insider_transactions": lambda ticker, time_frame: get_holder_info_yf(ticker, "insider_transactions"),
+    },
+    "option_insight": {
+        "option_summary": lambda ticker, time_frame: get_option_summary_yf(ticker),
+    },
+    "financials": {
+        "income_stmt": lambda ticker, time_frame: get_financial_statement_yf(ticker, "income_stmt"),
+        "balance_sheet": lambda ticker, time_frame: get_financial_statement_yf(ticker, "balance_sheet"),
+        "cashflow": lambda ticker, time_frame: get_financial_statement_yf(ticker, "cashflow"),
+    },
+    "news_summary": {},
+}
+
+async def fetch_news(ticker: str) -> dict:
+    """
+    Latest news plus FinBERT sentiment for the top articles, served from the news
+    store; Yahoo is polled at most once per NEWS_REFRESH_TTL and only unseen
+    articles are scored and embedded
+    """
+    if await asyncio.to_thread(news_store.needs_refresh, ticker):
+        articles = await get_yahoo_finance_news_yf(ticker)
+        if isinstance(articles, list):
+            try:
+                await news_store.ingest(ticker, articles, NEWS_LIMIT)
+                await asyncio.to_thread(news_store.mark_refreshed, ticker)
+            except Exception as e:
+                print(f"News ingest failed for {ticker}: {e}")
+
+    latest = await asyncio.to_thread(news_store.latest, ticker, NEWS_LIMIT)
+    return {
+        "news_summary": [{k: v for k, v in a.items() if k != "Sentiment"} for a in latest],
+        "news_sentiment": [
+            {"text": article_text(a), "sentiment": a["Sentiment"]} for a in latest[:NEWS_SENTIMENT_ARTICLES]
+        ],
+    }
+
+NEWS_KEYS = ("news_summary", "news_sentiment")
+# Intents answered from their own datasets alone; news is skipped to keep them fast
+NEWSLESS_INTENTS = {"price_quote"}
+
+def quote_only(intents: list) -> bool:
+    return bool(intents) and set(intents) <= NEWSLESS_INTENTS
+
+def dataset_keys(intents: list) -> list:
+    """
+    Every dataset key the intents produce, news included unless the intents are quote-only
+    """
+    keys = [] if quote_only(intents) else list(NEWS_KEYS)
+    for intent in intents:
+        keys.extend(INTENT_DATASETS.get(intent, {}))
+    return list(dict.fromkeys(keys))
+
+def dataset_ttl(key: str) -> float:
+    """
+    How long a session may keep serving a dataset before it is fetched again;
+    matches the cache that backs it, so the refetch is a real one
+    """
+    if key == "quote":
+        return QUOTE_TTL
+    if key in NEWS_KEYS:
+        return NEWS_REFRESH_TTL
+    return YF_CACHE_TTL
+
+def latency_budget(value, default_ms: float = MCP_BUDGET_MS) -> float | None:
+    """
+    Budget in seconds from a budget_ms value (body field or header), falling back
+    to default_ms; None means no deadline
+    """
+    try:
+        budget_ms = float(value) if value not in (None, "") else default_ms
+    except (TypeError, ValueError):
+        budget_ms = default_ms
+    return budget_ms / 1000 if budget_ms > 0 else None
+
+def pending_marker(budget: float) -> dict:
+    return {"error": f"Not ready within {budget * 1000:.0f} ms; still loading.", "pending": True}
+
+def is_pending(value) -> bool:
+    return isinstance(value, dict) and value.get("pending") is True
+
+def _flight_key(ticker: str, key, time_frame: str) -> tuple:
+    # News does not depend on the time frame, so every request shares one fetch
+    return ticker, key, None if key == NEWS_KEYS else time_frame
+
+def _finish_in_background(flight: tuple, task: asyncio.Task):
+    _background[flight] = task
+
+    def _done(done: asyncio.Task):
+        if _background.get(flight) is done:
+            del _background[flight]
+        if not done.cancelled() and done.exception() is not None:
+            print(f"Background MCP fetch failed: {done.exception()}")
+
+    task.add_done_callback(_done)
+
+async def collect_ticker_data(ticker: str, intents: list, time_frame: str = "1mo", only: list = None,
+                              budget: float = None) -> dict:
+    """
+    Fetches news and every dataset the intents need for one ticker, concurrently.
+    When two intents map the same key, the later intent wins. `only` restricts the
+    fetch to the given dataset keys (e.g. the ones a session does not hold yet).
+
+    With a budget (seconds), datasets still loading when it runs out are returned
+    as pending markers and keep running in the background, so their results land
+    in the caches for the next request; a later call for the same ticker and dataset
+    awaits that task rather than fetching again. The tasks inherit the request's scheduler
+    deadline: Yahoo fetches carry on, but news scoring and embedding that would
+    only start after it are shed and the stored articles are served instead.
+    """
+    fetchers = {}
+    result = {}
+    for intent in intents:
+        if intent in INTENT_DATASETS:
+            fetchers.update(INTENT_DATASETS[intent])
+        else:
+            result[f"{intent}_error"] = f"Unknown intent: {intent}"
+
+    keys = [key for key in fetchers if only is None or key in only]
+    want_news = not quote_only(intents) and (only is None or any(key in only for key in NEWS_KEYS))
+
+    starters = {key: (lambda key=key: fetchers[key](ticker, time_frame)) for key in keys}
+    if want_news:
+        starters[NEWS_KEYS] = lambda: fetch_news(ticker)
+    tasks = {
+        key: _background.get(_flight_key(ticker, key, time_frame)) or asyncio.ensure_future(start())
+        for key, start in starters.items()
+    }
+    if tasks:
+        try:
+            await asyncio.wait(tasks.values(), timeout=budget)
+        except asyncio.CancelledError:
+            # Caller went away: the fetches still finish and warm the caches
+            for key, task in tasks.items():
+                if not task.done():
+                    _finish_in_background(_flight_key(ticker, key, time_frame), task)
+            raise
+
+    news = {}
+    datasets = {}
+    for key, task in tasks.items():
+        if not task.done():
+            _finish_in_background(_flight_key(ticker, key, time_frame), task)
+            value = pending_marker(budget)
+        elif task.exception() is not None:
+            value = {"error": f"Error: fetching data for {ticker}: {task.exception()}"}
+        else:
+            value = task.result()
+
+        if key != NEWS_KEYS:
+            datasets[key] = value
+        else:
+            news = value if not (is_pending(value) or "error" in value) else {k: value for k in NEWS_KEYS}
+
+    return {**news, **datasets, **result}
+
+async def embed_datasets(ticker: str, intents: list, data: dict) -> List[Dict]:
+    """
+    Chunks and embeds MCP datasets for retrieval. News articles reuse the embeddings
+    computed when they were ingested into the news store.
+    """
+    data = dict(data)
+    chunks = []
+    if isinstance(data.get("news_summary"), list):
+        chunks.extend(await asyncio.to_thread(news_store.article_chunks, ticker, data.pop("news_summary"), intents))
+    chunks.extend(load_and_chunk_mcp_data({"ticker": ticker, "intents": intents, "data": data}))
+
+    for chunk in chunks:
+        chunk["chunk_id"] = f"{ticker}:{chunk['chunk_id']}"
+
+    ready = [c for c in chunks if "embedding" in c]
+    todo = [c for c in chunks if "embedding" not in c]
+    if todo:
+        ready.extend(await scheduler.run("embed", embed_chunks, todo))
+    return ready
@@ -0,0 +1,100 @@
+"""
+Compares the sentence-transformers MiniLM with the int8 ONNX backend: throughput
+for one large call, throughput with concurrent per-request calls (the ONNX path
+merged by the micro-batcher), and cosine drift of the ONNX vectors.
+
+Run from the repository root after exporting the ONNX model:
+    python -m scripts.bench_embeddings [mcp_response.json] [--requests 32]
+
+With an /mcp/ response saved as JSON, its chunks are used as the corpus;
+otherwise a synthetic set of financial sentences is generated.
+"""
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from agents.retriever.loader import load_and_chunk_mcp_data
+from agents.retriever.onnx_embedder import OnnxEmbedder
+from utils.batching import MicroBatcher
+from agents.retriever.embedder import MODEL_NAME, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS
+
+def synthetic_texts(n: int) -> list:
+    rng = np.random.default_rng(0)
+    tickers = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "NKE"]
+    templates = [
+        "{t} closed at {p:.2f} on volume of {v:,} shares after {d} guidance.",
+        "Analysts at a major bank moved {t} to {r} citing {d} margins and a price target of {p:.0f}.",
+        "{t} reported quarterly revenue of {p:.1f} billion, with operating cash flow {d} year over year.",
+        "Institutional holders of {t} {d} their positions; the largest now owns {v:,} shares.",
+    ]
+    words = {"d": ["stronger", "weaker", "mixed", "raised", "reduced"], "r": ["buy", "hold", "sell", "overweight"]}
+    return [
+        templates[i % len(templates)].format(
+            t=rng.choice(tickers), p=rng.uniform(10, 900), v=int(rng.integers(1e5, 1e8)),
+            d=rng.choice(words["d"]), r=rng.choice(words["r"])
+        )
+        for i in range(n)
+    ]
+
+def load_texts(path: str) -> list:
+    with open(path) as f:
+        response = json.load(f)
+    return [chunk["text"] for chunk in load_and_chunk_mcp_data(response)]
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def concurrent(encode, requests: list) -> float:
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        start = time.perf_counter()
+        list(pool.map(encode, requests))
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mcp_json", nargs="?")
+    parser.add_argument("--requests", type=int, default=32, help="concurrent requests to simulate")
+    parser.add_argument("--chunks", type=int, default=12, help="chunks per simulated request")
+    args = parser.parse_args()
+
+    texts = load_texts(args.mcp_json) if args.mcp_json else synthetic_texts(args.requests * args.chunks)
+    requests = [texts[i::args.requests] for i in range(args.requests)]
+    requests = [r for r in requests if r]
+
+    torch_model = SentenceTransformer(MODEL_NAME)
+    onnx_model = OnnxEmbedder()
+    batcher = MicroBatcher(onnx_model.encode, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS)
+
+    # Warm-up so lazy initialisation is not measured
+    torch_model.encode(texts[:8])
+    onnx_model.encode(texts[:8])
+
+    reference, torch_bulk = timed(lambda t: torch_model.encode(t, convert_to_numpy=True), texts)
+    candidate, onnx_bulk = timed(onnx_model.encode, texts)
+    torch_concurrent = concurrent(lambda t: torch_model.encode(t, convert_to_numpy=True), requests)
+    onnx_concurrent = concurrent(batcher.submit, requests)
+
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cosine = np.sum(reference * candidate, axis=1)
+
+    # Retrieval agreement: does each text's nearest neighbour stay the same?
+    ref_nn = np.argsort(-(reference @ reference.T), axis=1)[:, 1]
+    cand_nn = np.argsort(-(candidate @ candidate.T), axis=1)[:, 1]
+
+    n = len(texts)
+    print(f"{n} texts, {len(requests)} concurrent requests\n")
+    print(f"{'':28}{'torch fp32':>14}{'onnx int8':>14}{'speed-up':>10}")
+    print(f"{'single call (texts/s)':28}{n / torch_bulk:14.1f}{n / onnx_bulk:14.1f}{torch_bulk / onnx_bulk:9.2f}x")
+    print(f"{'concurrent (texts/s)':28}{n / torch_concurrent:14.1f}{n / onnx_concurrent:14.1f}"
+          f"{torch_concurrent / onnx_concurrent:9.2f}x")
+    print()
+    print(f"cosine vs torch: mean {cosine.mean():.4f}  min {cosine.min():.4f}  p01 {np.percentile(cosine, 1):.4f}")
+    print(f"nearest-neighbour agreement: {np.mean(ref_nn == cand_nn):.1%}")
+
+if __name__ == "__main__":
+    sys.exit(main())
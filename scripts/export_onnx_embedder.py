@@ -0,0 +1,51 @@
+"""
+Exports all-MiniLM-L6-v2 to ONNX and quantises its weights to int8 for
+EMBEDDING_BACKEND=onnx.
+
+Run from the repository root:
+    python -m scripts.export_onnx_embedder [output_dir]
+"""
+import sys
+import tempfile
+from pathlib import Path
+import torch
+from transformers import AutoModel, AutoTokenizer
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from agents.retriever.onnx_embedder import ONNX_MODEL_DIR
+
+HF_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+def export(output_dir: Path):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL)
+    model = AutoModel.from_pretrained(HF_MODEL).eval()
+
+    sample = tokenizer(["An example sentence."], return_tensors="pt")
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    axes = {0: "batch", 1: "sequence"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = Path(tmp) / "model_fp32.onnx"
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                inputs,
+                str(fp32_path),
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": axes,
+                    "attention_mask": axes,
+                    "token_type_ids": axes,
+                    "last_hidden_state": axes,
+                },
+                opset_version=17,
+            )
+        # Dynamic quantisation: int8 weights, activations quantised per batch at run time
+        quantize_dynamic(str(fp32_path), str(output_dir / "model.onnx"), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(str(output_dir))
+    print(f"Quantised ONNX embedder written to {output_dir}")
+
+if __name__ == "__main__":
+    export(Path(sys.argv[1]) if len(sys.argv) > 1 else ONNX_MODEL_DIR)
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from utils.batching import MicroBatcher
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        return np.array([[len(t)] for t in texts], dtype=np.float32)
+
+def test_concurrent_submits_share_one_encode_and_get_their_own_rows():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder, max_batch=64, max_wait_ms=100)
+    requests = [[f"r{i}-{'x' * j}" for j in range(3)] for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(batcher.submit, requests))
+
+    for texts, vectors in zip(requests, results):
+        assert vectors[:, 0].tolist() == [len(t) for t in texts]
+    assert len(encoder.calls) < len(requests)
+
+def test_max_batch_flushes_without_waiting():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder, max_batch=2, max_wait_ms=10_000)
+    assert batcher.submit(["a", "bb"])[:, 0].tolist() == [1, 2]
+
+def test_async_submit_and_errors_reach_the_caller():
+    def broken(texts):
+        raise RuntimeError("model down")
+
+    async def main():
+        ok = MicroBatcher(CountingEncoder(), max_batch=8, max_wait_ms=1)
+        vectors = await ok.submit_async(["abc"])
+        with pytest.raises(RuntimeError):
+            await MicroBatcher(broken, max_batch=8, max_wait_ms=1).submit_async(["abc"])
+        return vectors
+
+    assert asyncio.run(main())[:, 0].tolist() == [3]
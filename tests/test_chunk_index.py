@@ -0,0 +1,16 @@
+import numpy as np
+import agents.retriever.faiss_index as faiss_index
+from agents.retriever.faiss_index import ChunkIndex
+
+def chunk(ticker: str, i: int, vector: list) -> dict:
+    return {"chunk_id": f"{ticker}_{i}", "text": f"{ticker} chunk {i}", "ticker": ticker,
+            "embedding": np.array(vector, dtype=np.float32)}
+
+def test_indexes_are_isolated_per_request(monkeypatch):
+    monkeypatch.setattr(faiss_index, "encode_texts", lambda texts: np.ones((1, 2), dtype=np.float32))
+    aapl = ChunkIndex([chunk("AAPL", 0, [1, 1]), chunk("AAPL", 1, [0, 1])], dim=2)
+    msft = ChunkIndex([chunk("MSFT", 0, [1, 1])], dim=2)
+
+    assert [c["ticker"] for c in aapl.search("q", top_k=5)] == ["AAPL", "AAPL"]
+    assert [c["chunk_id"] for c in msft.search("q", top_k=5)] == ["MSFT_0"]
+    assert ChunkIndex([], dim=2).search("q") == []
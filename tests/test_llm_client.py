@@ -0,0 +1,153 @@
+import json
+import time
+import asyncio
+import httpx
+import pytest
+import utils.http
+import agents.llm.client as client_module
+from agents.llm.client import LLMClient
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+class StubServer:
+    """
+    Local stand-in for the chat-completions endpoint: each model gets a delay and
+    either an answer or an error, and every request's start and outcome is logged
+    """
+    def __init__(self, behaviour: dict):
+        self.behaviour = behaviour
+        self.started = {}
+        self.cancelled = []
+        self.calls = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        self.calls.append(model)
+        self.started[model] = time.monotonic()
+        delay, answer = self.behaviour[model]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        if answer is None:
+            return httpx.Response(500, json={"error": {"message": f"{model} is down"}})
+        return completion(answer)
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(behaviour: dict) -> StubServer:
+        server = StubServer(behaviour)
+        monkeypatch.setattr(utils.http, "_client", httpx.AsyncClient(transport=httpx.MockTransport(server.handler)))
+        return server
+    return install
+
+def make_client(models: list, **kwargs) -> LLMClient:
+    return LLMClient(models=models, base_url="http://stub.local/api/v1", api_key="test", **kwargs)
+
+def test_hedge_fires_at_p95_and_cancels_loser(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_HEDGE_MIN_DELAY", 0.0)
+    server = stub({"slow": (2.0, "slow answer"), "fast": (0.0, "fast answer")})
+    llm = make_client(["slow", "fast"])
+    for _ in range(20):
+        llm.stats["slow"].record_success(0.1)
+
+    start = time.monotonic()
+    answer = asyncio.run(llm.complete("hi"))
+    elapsed = time.monotonic() - start
+
+    assert answer == "fast answer"
+    assert elapsed < 1.0
+    # The hedge waits for the primary's p95 (0.1s) before racing the next model
+    assert server.started["fast"] - server.started["slow"] >= 0.09
+    assert server.cancelled == ["slow"]
+
+def test_no_hedge_when_primary_answers_within_p95(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_HEDGE_MIN_DELAY", 0.0)
+    server = stub({"primary": (0.01, "primary answer"), "backup": (0.0, "backup answer")})
+    llm = make_client(["primary", "backup"])
+    for _ in range(20):
+        llm.stats["primary"].record_success(0.5)
+
+    assert asyncio.run(llm.complete("hi")) == "primary answer"
+    assert server.calls == ["primary"]
+
+def test_failure_falls_through_to_next_model(stub):
+    server = stub({"broken": (0.0, None), "backup": (0.0, "backup answer")})
+    llm = make_client(["broken", "backup"], hedge=False)
+
+    assert asyncio.run(llm.complete("hi")) == "backup answer"
+    assert server.calls == ["broken", "backup"]
+    assert llm.stats["broken"].consecutive_failures == 1
+
+def test_breaker_opens_after_failures_and_half_opens_after_cooldown(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(client_module, "LLM_BREAKER_COOLDOWN", 0.2)
+    server = stub({"flaky": (0.0, None), "backup": (0.0, "backup answer")})
+    llm = make_client(["flaky", "backup"], hedge=False)
+
+    for _ in range(2):
+        assert asyncio.run(llm.complete("hi")) == "backup answer"
+    assert not llm.stats["flaky"].available()
+
+    # Open breaker: the flaky model is skipped entirely
+    server.calls.clear()
+    assert asyncio.run(llm.complete("hi")) == "backup answer"
+    assert server.calls == ["backup"]
+
+    # After the cooldown one trial request goes through (half-open) and succeeds
+    time.sleep(0.25)
+    server.behaviour["flaky"] = (0.0, "recovered")
+    server.calls.clear()
+    assert asyncio.run(llm.complete("hi")) == "recovered"
+    assert server.calls == ["flaky"]
+    assert llm.stats["flaky"].available()
+    assert llm.stats["flaky"].consecutive_failures == 0
+
+def test_half_open_failure_reopens_breaker(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(client_module, "LLM_BREAKER_COOLDOWN", 0.1)
+    stub({"flaky": (0.0, None), "backup": (0.0, "backup answer")})
+    llm = make_client(["flaky", "backup"], hedge=False)
+
+    asyncio.run(llm.complete("hi"))
+    time.sleep(0.15)
+    assert llm.stats["flaky"].available()
+
+    asyncio.run(llm.complete("hi"))
+    assert not llm.stats["flaky"].available()
+
+def test_half_open_admits_a_single_probe_for_concurrent_calls(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(client_module, "LLM_BREAKER_COOLDOWN", 0.1)
+    server = stub({"flaky": (0.0, None), "backup": (0.0, "backup answer")})
+    llm = make_client(["flaky", "backup"], hedge=False)
+
+    asyncio.run(llm.complete("hi"))
+    assert not llm.stats["flaky"].available()
+    time.sleep(0.15)
+
+    server.behaviour["flaky"] = (0.1, "recovered")
+    server.calls.clear()
+
+    async def burst():
+        return await asyncio.gather(llm.complete("hi"), llm.complete("hi"))
+
+    assert sorted(asyncio.run(burst())) == ["backup answer", "recovered"]
+    assert server.calls.count("flaky") == 1
+    assert llm.stats["flaky"].available() and llm.stats["flaky"].opened_at is None
+
+def test_failed_probe_restarts_the_cooldown(stub, monkeypatch):
+    monkeypatch.setattr(client_module, "LLM_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(client_module, "LLM_BREAKER_COOLDOWN", 0.1)
+    stub({"flaky": (0.0, None), "backup": (0.0, "backup answer")})
+    llm = make_client(["flaky", "backup"], hedge=False)
+
+    asyncio.run(llm.complete("hi"))
+    first_opened = llm.stats["flaky"].opened_at
+    time.sleep(0.15)
+    asyncio.run(llm.complete("hi"))
+
+    assert llm.stats["flaky"].opened_at > first_opened
+    assert not llm.stats["flaky"].available()
@@ -0,0 +1,42 @@
+import asyncio
+import orchestrator.mcp as mcp
+from orchestrator.mcp import dataset_keys
+from agents.retriever.session_store import Session
+
+def test_recommendation_datasets_have_distinct_keys():
+    keys = dataset_keys(["earnings_summary", "sentiment_analysis"])
+    assert "recommendations" in keys and "upgrades_downgrades" in keys
+
+def test_sentiment_follow_up_is_not_served_earnings_data():
+    session = Session("s")
+    session.add_datasets("AAPL", ["earnings_summary"], {"recommendations": [{"period": "0m"}], "financials": []})
+    assert session.missing("AAPL", dataset_keys(["sentiment_analysis"])) == [
+        "news_summary", "news_sentiment", "upgrades_downgrades"
+    ]
+
+def test_follow_up_joins_the_background_fetch(monkeypatch):
+    calls = {"info": 0, "news": 0}
+
+    async def slow_info(ticker, time_frame):
+        calls["info"] += 1
+        await asyncio.sleep(0.2)
+        return {"symbol": ticker}
+
+    async def slow_news(ticker):
+        calls["news"] += 1
+        await asyncio.sleep(0.2)
+        return {"news_summary": [], "news_sentiment": []}
+
+    monkeypatch.setitem(mcp.INTENT_DATASETS, "stock_lookup", {"stock_info": slow_info})
+    monkeypatch.setattr(mcp, "fetch_news", slow_news)
+
+    async def main():
+        first = await mcp.collect_ticker_data("AAPL", ["stock_lookup"], budget=0.05)
+        second = await mcp.collect_ticker_data("AAPL", ["stock_lookup"], budget=1.0)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert mcp.is_pending(first["stock_info"]) and mcp.is_pending(first["news_summary"])
+    assert second["stock_info"] == {"symbol": "AAPL"} and second["news_summary"] == []
+    assert calls == {"info": 1, "news": 1}
+    assert not mcp._background
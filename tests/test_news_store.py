@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+import numpy as np
+import agents.analytics.news_store as news_module
+from agents.analytics.news_store import NewsStore
+
+ARTICLES = [
+    {"URL": "https://example.com/a?utm=1", "Title": "A", "Published": "2026-01-02T00:00:00Z"},
+    {"URL": "https://example.com/b", "Title": "B", "Published": "2026-01-03T00:00:00Z"},
+]
+
+def install_models(monkeypatch, model: str, calls: dict):
+    def sentiment(text):
+        calls["sentiment"] += 1
+        return "positive"
+
+    def encode(texts):
+        calls["embed"] += len(texts)
+        return np.ones((len(texts), 384), dtype=np.float32)
+
+    monkeypatch.setattr(news_module, "analyze_sentiment_finbert", sentiment)
+    monkeypatch.setattr(news_module, "encode_texts", encode)
+    monkeypatch.setattr(news_module, "embedding_model_id", lambda: model)
+
+def test_ingest_reembeds_only_when_model_changes(tmp_path, monkeypatch):
+    store = NewsStore(tmp_path / "news.sqlite")
+    calls = {"sentiment": 0, "embed": 0}
+
+    install_models(monkeypatch, "model-a", calls)
+    asyncio.run(store.ingest("AAPL", ARTICLES))
+    asyncio.run(store.ingest("AAPL", ARTICLES))
+    assert calls == {"sentiment": 2, "embed": 2}
+
+    install_models(monkeypatch, "model-b", calls)
+    assert store.embeddings(["https://example.com/a"], "model-b") == {}
+    asyncio.run(store.ingest("AAPL", ARTICLES))
+    # Sentiment is kept, only the vectors are recomputed for the new model
+    assert calls == {"sentiment": 2, "embed": 4}
+    assert set(store.embeddings(["https://example.com/a", "https://example.com/b"], "model-b")) == {
+        "https://example.com/a", "https://example.com/b"
+    }
+    assert [a["Sentiment"] for a in store.latest("AAPL")] == ["positive", "positive"]
+
+def test_untagged_store_is_migrated(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE articles (url TEXT PRIMARY KEY, title TEXT, summary TEXT, description TEXT, "
+                 "published_at INTEGER, sentiment TEXT, embedding BLOB, ingested_at REAL)")
+    conn.execute("INSERT INTO articles (url, embedding) VALUES ('https://example.com/a', ?)",
+                 (np.ones(384, dtype=np.float32).tobytes(),))
+    conn.commit()
+    conn.close()
+
+    store = NewsStore(path)
+    assert store.unembedded(["https://example.com/a"], "model-a") == {"https://example.com/a"}
+
+def test_failed_scores_are_kept_null_and_do_not_abort_ingest(tmp_path, monkeypatch):
+    store = NewsStore(tmp_path / "news.sqlite")
+    calls = {"sentiment": 0, "embed": 0}
+    install_models(monkeypatch, "model-a", calls)
+
+    def flaky_sentiment(text):
+        if text.startswith("B"):
+            raise RuntimeError("shed")
+        return "positive"
+
+    monkeypatch.setattr(news_module, "analyze_sentiment_finbert", flaky_sentiment)
+    asyncio.run(store.ingest("AAPL", ARTICLES))
+
+    assert {a["Title"]: a["Sentiment"] for a in store.latest("AAPL")} == {"A": "positive", "B": "UNKNOWN"}
+    assert store.unscored(["https://example.com/a", "https://example.com/b"]) == {"https://example.com/b"}
+    assert store.unembedded(["https://example.com/a", "https://example.com/b"], "model-a") == set()
+
+def test_ingest_scores_only_the_newest_articles_and_undated_sort_last(tmp_path, monkeypatch):
+    store = NewsStore(tmp_path / "news.sqlite")
+    calls = {"sentiment": 0, "embed": 0}
+    install_models(monkeypatch, "model-a", calls)
+    articles = [
+        {"URL": f"https://example.com/{day}", "Title": str(day), "Published": f"2026-01-{day:02d}T00:00:00Z"}
+        for day in range(1, 21)
+    ]
+    undated = {"URL": "https://example.com/undated", "Title": "undated", "Published": ""}
+
+    asyncio.run(store.ingest("AAPL", [undated] + articles, limit=5))
+    assert calls == {"sentiment": 5, "embed": 5}
+    assert [a["Title"] for a in store.latest("AAPL")] == ["20", "19", "18", "17", "16"]
+
+    asyncio.run(store.ingest("AAPL", [undated], limit=5))
+    assert store.latest("AAPL", limit=10)[-1]["Title"] == "undated"
+    assert store.latest("AAPL", limit=10)[-1]["Published"] == ""
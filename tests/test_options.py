@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+import pandas as pd
+import pytest
+from agents.analytics.options import max_pain, oi_weighted_strike, top_oi_strikes, summarize_expiry
+
+def make_chain(oi: list, iv: list) -> pd.DataFrame:
+    return pd.DataFrame({
+        "strike": [95.0, 100.0, 105.0],
+        "openInterest": oi,
+        "volume": [1, 2, 3],
+        "impliedVolatility": iv,
+    })
+
+CALLS = make_chain([10, 20, 30], [0.28, 0.26, 0.22])
+PUTS = make_chain([30, 20, 10], [0.40, 0.30, 0.25])
+
+def test_max_pain_is_the_cheapest_settlement():
+    # Pain at 95 / 100 / 105 is 200 / 100 / 200
+    assert max_pain(CALLS, PUTS) == 100.0
+
+def test_max_pain_needs_open_interest():
+    empty = make_chain([0, 0, 0], [0.2, 0.2, 0.2])
+    assert max_pain(empty, empty) is None
+
+def test_oi_weighted_and_top_strikes():
+    assert oi_weighted_strike(CALLS) == pytest.approx(101.6667)
+    assert oi_weighted_strike(make_chain([0, 0, 0], [0.2, 0.2, 0.2])) is None
+    assert top_oi_strikes(CALLS, n=2) == [105.0, 100.0]
+    assert top_oi_strikes(pd.DataFrame()) == []
+
+def test_summary_skew_and_atm_iv():
+    expiry = (date.today() + timedelta(days=7)).isoformat()
+    summary = summarize_expiry(expiry, CALLS, PUTS, spot=100.0)
+
+    assert summary["days_to_expiry"] == 7
+    assert summary["put_call_oi_ratio"] == 1.0
+    assert summary["atm_iv"] == pytest.approx(0.28)
+    # 95 put IV minus 105 call IV
+    assert summary["skew"] == pytest.approx(0.18)
+
+def test_skew_skips_placeholder_iv():
+    puts = make_chain([30, 20, 10], [0.00001, 0.30, 0.25])
+    summary = summarize_expiry(date.today().isoformat(), CALLS, puts, spot=100.0)
+    assert summary["skew"] == pytest.approx(0.30 - 0.22)
+
+def test_summary_without_spot_has_no_iv():
+    summary = summarize_expiry(date.today().isoformat(), CALLS, PUTS, spot=None)
+    assert summary["atm_iv"] is None and summary["skew"] is None
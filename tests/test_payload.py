@@ -0,0 +1,70 @@
+from utils.payload import (
+    downsample_ohlc, project, shape, to_columns, from_columns, encode_datasets, decode_datasets,
+    validate_options, session_date
+)
+
+def bar(stamp: str, open_: float, close: float, high: float, low: float, volume: int = 100) -> dict:
+    return {"Date": stamp, "Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume,
+            "Dividends": 0.0, "Stock Splits": 0.0}
+
+def test_weekly_bars_merge_ohlc():
+    records = [
+        bar("2026-01-05T05:00:00.000Z", 10, 11, 12, 9),    # Monday, New York
+        bar("2026-01-06T05:00:00.000Z", 11, 13, 14, 10),
+        bar("2026-01-12T05:00:00.000Z", 13, 12, 13, 11),   # next Monday
+    ]
+    weeks = downsample_ohlc(records, "1wk")
+    assert [(w["Open"], w["High"], w["Low"], w["Close"], w["Volume"]) for w in weeks] == [
+        (10, 14, 9, 13, 200), (13, 13, 11, 12, 100)
+    ]
+    assert records[0]["Close"] == 11
+
+def test_buckets_use_the_exchange_local_date():
+    # Tokyo sessions start at 15:00Z the previous day: Monday 2026-02-02 is 2026-02-01T15:00Z
+    records = [
+        bar("2026-01-30T15:00:00.000Z", 1, 2, 2, 1),       # Friday 30 Jan in Tokyo
+        bar("2026-02-01T15:00:00.000Z", 3, 4, 4, 3),       # Monday 2 Feb in Tokyo
+    ]
+    assert len(downsample_ohlc(records, "1wk")) == 2
+    months = downsample_ohlc(records, "1mo")
+    assert [(m["Open"], m["Close"]) for m in months] == [(1, 2), (3, 4)]
+
+    assert str(session_date("2026-02-01T15:00:00.000Z")) == "2026-02-02"   # Tokyo
+    assert str(session_date("2026-02-02T05:00:00.000Z")) == "2026-02-02"   # New York
+    assert str(session_date("2026-06-01T23:00:00.000Z")) == "2026-06-02"   # London, summer time
+    assert str(session_date("2026-02-02")) == "2026-02-02"
+
+def test_projection_keeps_requested_datasets_and_fields_without_mutating():
+    data = {
+        "historical_prices": [bar("2026-01-05T05:00:00.000Z", 10, 11, 12, 9)],
+        "stock_info": {"symbol": "AAPL", "sector": "Tech"},
+        "news_summary": [],
+    }
+    projected = project(data, ["historical_prices", "stock_info"], {"historical_prices": ["Date", "Close"],
+                                                                     "stock_info": ["sector"]})
+    assert projected == {
+        "historical_prices": [{"Date": "2026-01-05T05:00:00.000Z", "Close": 11}],
+        "stock_info": {"sector": "Tech"},
+    }
+    assert data["stock_info"] == {"symbol": "AAPL", "sector": "Tech"}
+
+def test_columnar_round_trip():
+    rows = [{"a": 1, "b": "x"}, {"a": 2, "c": None}]
+    table = to_columns(rows)
+    assert table["columns"] == ["a", "b", "c"]
+    assert from_columns(table) == [{"a": 1, "b": "x", "c": None}, {"a": 2, "b": None, "c": None}]
+
+    data = {"prices": rows, "info": {"k": "v"}}
+    assert decode_datasets(encode_datasets(data))["info"] == {"k": "v"}
+    assert shape(data, {"encoding": "columnar"})["prices"]["encoding"] == "columnar"
+
+def test_validate_options():
+    assert validate_options({}) is None
+    assert validate_options({"datasets": ["quote"], "fields": {"quote": ["price"]},
+                             "price_resolution": "1mo", "encoding": "columnar"}) is None
+    assert validate_options({"datasets": "quote"}) is not None
+    assert validate_options({"fields": ["price"]}) is not None
+    assert validate_options({"fields": {"quote": "price"}}) is not None
+    assert validate_options({"price_resolution": "2wk"}) is not None
+    assert validate_options({"price_resolution": ["1mo"]}) is not None
+    assert validate_options({"encoding": "rows"}) is not None
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from agents.api import price_store
+from agents.api.price_store import PriceStore, BAR_DTYPE
+from agents.api.yfinance_client import _to_records
+
+def make_bars(days: list, dividends: float = np.nan) -> np.ndarray:
+    bars = np.zeros(len(days), dtype=BAR_DTYPE)
+    bars["ts"] = np.array(days, dtype=np.int64) * 86_400 * 10**9
+    bars["close"] = 100.0 + np.arange(len(days))
+    bars["dividends"] = dividends
+    bars["splits"] = np.nan
+    return bars
+
+@pytest.mark.parametrize("ticker", ["../../tmp/x", "AAPL/../../x", "a b", "", "X" * 16])
+def test_rejects_tickers_that_are_not_symbols(tmp_path, ticker):
+    with pytest.raises(ValueError):
+        PriceStore(tmp_path).bars(ticker)
+
+@pytest.mark.parametrize("ticker", ["AAPL", "brk-b", "BRK.B", "^GSPC", "EURUSD=X"])
+def test_accepts_yahoo_symbols(tmp_path, ticker):
+    assert PriceStore(tmp_path).bars(ticker).size == 0
+
+def test_nan_actions_take_the_delta_path(tmp_path):
+    store = PriceStore(tmp_path)
+    path = tmp_path / "AAPL_1d.bin"
+    stored = make_bars([1, 2, 3])
+    path.write_bytes(stored.tobytes())
+
+    fresh = make_bars([3, 4])
+    assert store._merge(path, store.bars("AAPL"), fresh)
+    assert store.bars("AAPL")["ts"].tolist() == make_bars([1, 2, 3, 4])["ts"].tolist()
+
+def test_new_dividend_forces_full_refetch(tmp_path):
+    store = PriceStore(tmp_path)
+    path = tmp_path / "AAPL_1d.bin"
+    path.write_bytes(make_bars([1, 2, 3]).tobytes())
+
+    fresh = make_bars([3, 4])
+    fresh["dividends"][1] = 0.25
+    assert not store._merge(path, store.bars("AAPL"), fresh)
+
+class FakeTicker:
+    """
+    Serves daily bars for the last 3000 days and records each history() call
+    """
+    calls = []
+
+    def __init__(self, ticker):
+        pass
+
+    def history(self, period=None, start=None, interval="1d"):
+        FakeTicker.calls.append(period or start)
+        today = pd.Timestamp.now(tz="UTC").normalize()
+        index = pd.date_range(end=today, periods=3000, freq="D")
+        if start is not None:
+            index = index[index >= pd.Timestamp(start, tz="UTC")]
+        return pd.DataFrame({"Close": 1.0, "Volume": 1000.0}, index=index)
+
+@pytest.fixture
+def fake_yahoo(monkeypatch):
+    FakeTicker.calls = []
+    monkeypatch.setattr(price_store.yf, "Ticker", FakeTicker)
+    return FakeTicker.calls
+
+def test_first_sync_fetches_only_the_requested_period(tmp_path, fake_yahoo):
+    store = PriceStore(tmp_path)
+    store.history("AAPL", "1mo", "1d")
+
+    assert fake_yahoo[0] != "max"
+    assert store.bars("AAPL").size < 40
+
+def test_longer_period_extends_the_file(tmp_path, fake_yahoo):
+    store = PriceStore(tmp_path)
+    store.history("AAPL", "1mo", "1d")
+    store.history("AAPL", "1y", "1d")
+    assert 360 <= store.bars("AAPL").size < 400
+
+    store.history("AAPL", "max", "1d")
+    assert fake_yahoo[-1] == "max"
+    assert store.bars("AAPL").size == 3000
+
+def test_covered_period_is_not_refetched(tmp_path, fake_yahoo):
+    store = PriceStore(tmp_path)
+    store.history("AAPL", "1y", "1d")
+    store.history("AAPL", "1mo", "1d")
+    assert len(fake_yahoo) == 1
+
+def test_records_report_whole_share_volume():
+    frame = pd.DataFrame({"Close": [1.0, 2.0], "Volume": [1000.0, np.nan]})
+    records = _to_records(frame)
+    assert records[0]["Volume"] == 1000 and type(records[0]["Volume"]) is int
+    assert records[1]["Volume"] is None
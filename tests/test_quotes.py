@@ -0,0 +1,7 @@
+from datetime import date
+from agents.api.quotes import _trade_date
+
+def test_trade_date_is_a_weekday_in_the_exchange_timezone():
+    for tz in ("America/New_York", "Asia/Tokyo", None, "Not/AZone"):
+        day = date.fromisoformat(_trade_date(tz))
+        assert day.weekday() < 5
@@ -0,0 +1,60 @@
+import time
+import asyncio
+import pytest
+from utils.scheduler import Scheduler, Stage, Overloaded, start_deadline, current_deadline
+
+def test_queued_work_past_request_deadline_is_shed():
+    scheduler = Scheduler({"embed": 1})
+
+    async def main():
+        busy = asyncio.create_task(scheduler.run("embed", asyncio.sleep, 0.3))
+        await asyncio.sleep(0.01)
+        start_deadline(0.1)
+        start = time.monotonic()
+        with pytest.raises(Overloaded):
+            await scheduler.run("embed", asyncio.sleep, 0)
+        shed_after = time.monotonic() - start
+        await busy
+        return shed_after
+
+    assert asyncio.run(main()) < 0.2
+
+def test_no_budget_leaves_deadline_unset():
+    async def main():
+        start_deadline(None)
+        return current_deadline.get()
+
+    assert asyncio.run(main()) is None
+
+def test_cancelled_waiter_failed_as_expired_returns_no_slot():
+    stage = Stage("embed", concurrency=1)
+
+    async def main():
+        await stage.acquire(0, time.monotonic() + 10)
+        stage.service_time = 0.0
+        waiter = asyncio.create_task(stage.acquire(0, time.monotonic() + 0.05))
+        await asyncio.sleep(0.01)
+        time.sleep(0.06)
+        # The waiter has expired: release() fails it, then it is cancelled before it resumes
+        stage.release()
+        waiter.cancel()
+        with pytest.raises((asyncio.CancelledError, Overloaded)):
+            await waiter
+        return stage.active
+
+    assert asyncio.run(main()) == 0
+
+def test_cancelled_waiter_that_was_granted_hands_the_slot_back():
+    stage = Stage("embed", concurrency=1)
+
+    async def main():
+        await stage.acquire(0, time.monotonic() + 10)
+        waiter = asyncio.create_task(stage.acquire(0, time.monotonic() + 10))
+        await asyncio.sleep(0.01)
+        stage.release()
+        waiter.cancel()
+        (outcome,) = await asyncio.gather(waiter, return_exceptions=True)
+        # Either the waiter got out with the slot or it handed the slot back
+        return stage.active == (0 if isinstance(outcome, BaseException) else 1)
+
+    assert asyncio.run(main())
@@ -0,0 +1,63 @@
+import time
+import threading
+import numpy as np
+import agents.retriever.session_store as session_module
+from agents.retriever.session_store import Session
+
+def test_session_byte_count_tracks_adds_and_replacements():
+    session = Session("s")
+
+    def recount():
+        text = sum(len(m["text"]) for m in session.meta.values())
+        return sum(session.dataset_bytes.values()) + text + session.index.ntotal * 384 * 4
+
+    session.add_datasets("AAPL", ["stock_lookup"], {"stock_info": {"a": 1}})
+    session.add_embedded([{"chunk_id": "c0", "text": "hello", "ticker": "AAPL", "source": "stock_info",
+                           "embedding": np.zeros(384, dtype=np.float32)}])
+    assert session.nbytes == recount()
+
+    session.add_datasets("AAPL", ["stock_lookup"], {"stock_info": {"a": 2, "b": 3}})
+    assert session.index.ntotal == 0
+    assert session.nbytes == recount()
+
+def test_datasets_older_than_their_ttl_count_as_missing(monkeypatch):
+    session = Session("s")
+    session.add_datasets("AAPL", ["price_quote"], {"quote": {"price": 1.0}, "stock_info": {"a": 1}})
+    ttl = {"quote": 5.0, "stock_info": 300.0}.get
+
+    assert session.missing("AAPL", ["quote", "stock_info"], ttl=ttl) == []
+    later = time.monotonic() + 10
+    monkeypatch.setattr(session_module.time, "monotonic", lambda: later)
+    assert session.missing("AAPL", ["quote", "stock_info"], ttl=ttl) == ["quote"]
+    assert session.missing("AAPL", ["quote", "stock_info"]) == []
+
+def test_search_while_datasets_are_replaced(monkeypatch):
+    monkeypatch.setattr(session_module, "encode_texts", lambda texts: np.ones((len(texts), 384), dtype=np.float32))
+    session = Session("s")
+    stop = threading.Event()
+    errors = []
+
+    def searcher():
+        while not stop.is_set():
+            try:
+                for hit in session.search("q", top_k=3):
+                    assert hit["ticker"] == "AAPL"
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=searcher)
+    thread.start()
+    try:
+        for i in range(200):
+            session.add_datasets("AAPL", ["stock_lookup"], {"stock_info": {"v": i}})
+            session.add_embedded([
+                {"chunk_id": f"c{i}-{j}", "text": "t", "ticker": "AAPL", "source": "stock_info",
+                 "embedding": np.full(384, j, dtype=np.float32)}
+                for j in range(5)
+            ])
+    finally:
+        stop.set()
+        thread.join()
+
+    assert not errors
+    assert session.index.ntotal == 5
@@ -0,0 +1,43 @@
+import csv
+from agents.api.symbol_master import SymbolMaster, SYMBOL_MASTER_PATH
+
+def test_default_path_does_not_depend_on_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert SYMBOL_MASTER_PATH.is_absolute()
+    assert len(SymbolMaster()) > 0
+
+def test_check_always_validates_syntax():
+    master = SymbolMaster()
+    assert master.check("AAPL") is None
+    assert master.check("BRK-B") is None
+    assert master.check("^GSPC") is None
+    assert "error" in master.check("../etc/passwd")
+    assert "error" in master.check("AAPL MSFT")
+    assert "error" in master.check("")
+
+def test_strict_mode_needs_a_full_listing(tmp_path):
+    path = tmp_path / "symbols.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["ticker", "name", "aliases", "exchange", "isin"])
+        writer.writeheader()
+        writer.writerow({"ticker": "AAPL", "name": "Apple Inc."})
+
+    assert SymbolMaster(path, strict=True).check("ZZZZ") is None
+    assert "error" in SymbolMaster(path, strict=True, strict_min=1).check("ZZZZ")
+
+def test_lookup_exact_and_fuzzy():
+    master = SymbolMaster()
+    assert master.lookup("Apple")["ticker"] == "AAPL"
+    assert master.lookup("Gogle")["ticker"] == "GOOGL"
+    assert master.lookup("Microsft")["ticker"] == "MSFT"
+
+def test_lookup_rejects_fragments_and_ambiguous_names():
+    master = SymbolMaster()
+    assert master.lookup("Alpha") is None
+    assert master.lookup("Morgan") is None
+    assert master.lookup("JP Morgan")["ticker"] == "JPM"
+    assert master.lookup("Morgan Stanley")["ticker"] == "MS"
+
+def test_resolve_drops_unknown_names():
+    master = SymbolMaster()
+    assert master.resolve(["Apple", "Ford", "Intuit", "ZZZZ", "bad ticker"]) == ["AAPL", "ZZZZ"]
@@ -0,0 +1,75 @@
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import List
+import numpy as np
+
+class MicroBatcher:
+    """
+    Merges encode calls made concurrently (from request threads, or from model server
+    connections) into one call of `encode` on a dedicated thread, flushing when
+    max_batch texts are queued or max_wait_ms has passed since the first one arrived.
+    Used by the in-process ONNX embedder and by the shared model server.
+    """
+    def __init__(self, encode, max_batch: int, max_wait_ms: float, name: str = "embed-batcher"):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, texts: List[str]) -> Future:
+        future = Future()
+        self.queue.put((texts, future))
+        return future
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        """
+        Blocking; call it from a worker thread
+        """
+        return self._enqueue(texts).result()
+
+    async def submit_async(self, texts: List[str]) -> np.ndarray:
+        """
+        Awaitable form for event-loop callers; no thread is held while waiting
+        """
+        return await asyncio.wrap_future(self._enqueue(texts))
+
+    def _collect(self) -> list:
+        batch = [self.queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while count < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            # Callers that went away (cancelled awaits) are skipped, not encoded
+            batch = [(texts, future) for texts, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = self.encode(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
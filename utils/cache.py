@@ -0,0 +1,71 @@
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+
+def _is_cacheable(value) -> bool:
+    # Error results are never cached so the next request retries
+    return not (isinstance(value, dict) and "error" in value)
+
+class TTLCache:
+    """
+    In-memory async cache with per-entry TTL, LRU eviction and single-flight:
+    concurrent callers for the same key share one in-flight fetch.
+    """
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._inflight = {}
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(self, key, factory):
+        if (entry := self.get(key)) is not None:
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def _store(done: asyncio.Future):
+                self._inflight.pop(key, None)
+                if not done.cancelled() and done.exception() is None and _is_cacheable(done.result()):
+                    self.set(key, done.result())
+
+            task.add_done_callback(_store)
+
+        # Shielded so one caller giving up does not cancel the fetch others are waiting on
+        return await asyncio.shield(task)
+
+def cached(ttl: float, maxsize: int = 1024):
+    """
+    Caches an async function's results by its arguments
+    """
+    def decorator(fn):
+        cache = TTLCache(ttl, maxsize)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_fetch(key, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,33 @@
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+    )
+
+async def start_http_client():
+    """
+    Creates the shared keep-alive connection pool; called from the app lifespan
+    """
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared pooled client, creating it lazily when used outside the app
+    (scripts, notebooks)
+    """
+    global _client
+    if _client is None:
+        _client = _new_client()
+    return _client
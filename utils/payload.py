@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict
+
+COLUMNAR = "columnar"
+
+# Calendar bucket for each downsampling resolution, keyed off a session date
+RESOLUTIONS = {
+    "1wk": lambda d: d.isocalendar()[:2],
+    "1mo": lambda d: (d.year, d.month),
+    "3mo": lambda d: (d.year, (d.month - 1) // 3),
+    "1y": lambda d: d.year,
+}
+
+# Daily bars are stamped at the exchange's local midnight and sent as UTC, so a
+# Tokyo session starts at 15:00Z the day before. Every exchange lies between
+# UTC-9 and UTC+14, so shifting by 14 hours lands inside the local session date.
+SESSION_SHIFT = timedelta(hours=14)
+
+def session_date(value) -> date:
+    """
+    Exchange-local trading date of a daily bar's Date (ISO string, UTC or naive)
+    """
+    text = str(value)
+    stamp = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if stamp.tzinfo is None:
+        return stamp.date()
+    return (stamp.astimezone(timezone.utc) + SESSION_SHIFT).date()
+
+def validate_options(options: Dict) -> str | None:
+    """
+    Error message for malformed payload options, or None when they can be applied
+    """
+    datasets = options.get("datasets")
+    if datasets is not None and not (isinstance(datasets, list) and all(isinstance(k, str) for k in datasets)):
+        return "'datasets' must be a list of dataset names."
+
+    fields = options.get("fields")
+    if fields is not None and not (
+        isinstance(fields, dict)
+        and all(isinstance(v, list) and all(isinstance(c, str) for c in v) for v in fields.values())
+    ):
+        return "'fields' must map dataset names to lists of field names."
+
+    resolution = options.get("price_resolution")
+    if resolution is not None and not (isinstance(resolution, str) and resolution in RESOLUTIONS):
+        return f"'price_resolution' must be one of: {', '.join(RESOLUTIONS)}."
+
+    encoding = options.get("encoding")
+    if encoding is not None and encoding != COLUMNAR:
+        return f"'encoding' must be '{COLUMNAR}'."
+    return None
+
+def _is_table(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+def to_columns(records: List[Dict]) -> Dict:
+    """
+    Turns a list of records into {"encoding": "columnar", "columns": [...], "values": [[...], ...]},
+    one value list per column, so keys are sent once instead of once per row
+    """
+    columns = list(dict.fromkeys(key for row in records for key in row))
+    return {
+        "encoding": COLUMNAR,
+        "columns": columns,
+        "values": [[row.get(column) for row in records] for column in columns],
+    }
+
+def from_columns(table: Dict) -> List[Dict]:
+    columns = table.get("columns", [])
+    return [dict(zip(columns, row)) for row in zip(*table.get("values", []))]
+
+def is_columnar(value) -> bool:
+    return isinstance(value, dict) and value.get("encoding") == COLUMNAR
+
+def encode_datasets(data: Dict) -> Dict:
+    """
+    Columnar-encodes every tabular dataset, leaving the others as they are
+    """
+    return {key: to_columns(value) if _is_table(value) else value for key, value in data.items()}
+
+def decode_datasets(data: Dict) -> Dict:
+    return {key: from_columns(value) if is_columnar(value) else value for key, value in data.items()}
+
+def downsample_ohlc(records: List[Dict], resolution: str) -> List[Dict]:
+    """
+    Merges daily price records into OHLC bars per calendar bucket (week, month, ...)
+    of the exchange-local session date: first open, highest high, lowest low, last
+    close, summed volume and dividends
+    """
+    bucket_of = RESOLUTIONS.get(resolution)
+    if bucket_of is None or not _is_table(records) or "Date" not in records[0]:
+        return records
+
+    bars = []
+    bucket = None
+    for row in records:
+        key = bucket_of(session_date(row["Date"]))
+        if key != bucket:
+            bucket = key
+            bars.append(dict(row))
+            continue
+
+        bar = bars[-1]
+        for field, pick in (("High", max), ("Low", min)):
+            if row.get(field) is not None:
+                bar[field] = row[field] if bar.get(field) is None else pick(bar[field], row[field])
+        for field in ("Volume", "Dividends"):
+            if row.get(field) is not None:
+                bar[field] = (bar.get(field) or 0) + row[field]
+        if row.get("Stock Splits"):
+            bar["Stock Splits"] = (bar.get("Stock Splits") or 1) * row["Stock Splits"]
+        if row.get("Close") is not None:
+            bar["Close"] = row["Close"]
+    return bars
+
+def project(data: Dict, datasets: list = None, fields: Dict = None) -> Dict:
+    """
+    Keeps only the requested datasets and, per dataset, the requested columns (for
+    tables) or keys (for dicts). Returns new containers; the input is never mutated.
+    """
+    if datasets:
+        data = {key: value for key, value in data.items() if key in datasets}
+
+    projected = {}
+    for key, value in data.items():
+        wanted = (fields or {}).get(key)
+        if not wanted:
+            projected[key] = value
+        elif _is_table(value):
+            projected[key] = [{c: row[c] for c in wanted if c in row} for row in value]
+        elif isinstance(value, dict) and "error" not in value:
+            projected[key] = {c: value[c] for c in wanted if c in value}
+        else:
+            projected[key] = value
+    return projected
+
+def shape(data: Dict, options: Dict, price_keys: tuple = ("historical_prices",)) -> Dict:
+    """
+    Applies a request's payload options (checked with validate_options) to a dataset dict:
+      datasets          only these dataset keys
+      fields            {dataset: [columns or keys]}
+      price_resolution  downsample price history to 1wk / 1mo / 3mo / 1y bars
+      encoding          "columnar" to send tables column-wise
+    """
+    data = project(data, options.get("datasets"), options.get("fields"))
+
+    if resolution := options.get("price_resolution"):
+        data = {
+            key: downsample_ohlc(value, resolution) if key in price_keys else value
+            for key, value in data.items()
+        }
+
+    if options.get("encoding") == COLUMNAR:
+        data = encode_datasets(data)
+    return data
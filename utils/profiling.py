@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Off by default: the header lets any client start a stack sampler and write to disk
+PROFILE_HEADER_ENABLED = os.getenv("PROFILE_HEADER_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Leaf frames in these modules are threads parked on a queue or the event loop's selector
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+current_profile: ContextVar["Profile | None"] = ContextVar("current_profile", default=None)
+
+# One profile at a time keeps the overhead bounded no matter how many requests ask for it
+_active = threading.Lock()
+
+class Sampler(threading.Thread):
+    """
+    Samples the Python stacks of every other thread at a fixed interval and
+    aggregates them into folded-stack counts
+    """
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class Profile:
+    """
+    Stack samples and stage timings for a single request
+    """
+    def __init__(self, method: str, path: str):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.stages = {}
+        self.start = time.perf_counter()
+        self.sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+
+    def record(self, name: str, seconds: float, queued: float = 0.0):
+        stage = self.stages.setdefault(name, {"count": 0, "total_ms": 0.0, "queued_ms": 0.0})
+        stage["count"] += 1
+        stage["total_ms"] += seconds * 1000
+        stage["queued_ms"] += queued * 1000
+
+    def write(self, status: int):
+        """
+        Writes <id>.folded (flamegraph.pl / speedscope input) and <id>.json with the
+        stage timings, then trims the directory to the newest PROFILE_MAX_FILES profiles
+        """
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        folded = "\n".join(f"{stack} {count}" for stack, count in self.sampler.stacks.most_common())
+        (PROFILE_DIR / f"{self.id}.folded").write_text(folded + "\n" if folded else "")
+        (PROFILE_DIR / f"{self.id}.json").write_text(json.dumps({
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": self.sampler.samples,
+            "stages": {
+                name: {k: round(v, 2) if isinstance(v, float) else v for k, v in stage.items()}
+                for name, stage in self.stages.items()
+            },
+        }, indent=2))
+
+        sidecars = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for old in sidecars[:-PROFILE_MAX_FILES] if PROFILE_MAX_FILES > 0 else sidecars:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".folded").unlink(missing_ok=True)
+
+def record_stage(name: str, seconds: float, queued: float = 0.0):
+    """
+    Adds a stage timing to the request's profile; a no-op when it is not profiled
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(name, seconds, queued)
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def _wants_profile(scope) -> bool:
+    if PROFILE_HEADER_ENABLED:
+        for key, value in scope.get("headers", []):
+            if key == b"x-profile" and value.lower() in (b"1", b"true", b"yes"):
+                return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests sent with `X-Profile: 1`, plus a random
+    PROFILE_SAMPLE_RATE fraction of all requests. Profiled responses carry an
+    X-Profile-Id header naming the files written under PROFILE_DIR.
+
+    The sampler sees every thread in the process, so frames from requests running
+    concurrently with the profiled one show up as well.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope) or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope.get("method", ""), scope.get("path", ""))
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = current_profile.set(profile)
+        profile.sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_profile.reset(token)
+            profile.sampler.stop()
+            _active.release()
+            try:
+                profile.write(status)
+            except OSError as e:
+                print(f"Failed to write profile {profile.id}: {e}")
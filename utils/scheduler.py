@@ -0,0 +1,149 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextvars import ContextVar
+from utils.profiling import record_stage
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Set per request/task; stages pick them up without threading arguments through every call
+current_priority: ContextVar[int] = ContextVar("current_priority", default=INTERACTIVE)
+current_deadline: ContextVar[float | None] = ContextVar("current_deadline", default=None)
+
+SCHED_MAX_QUEUE = int(os.getenv("SCHED_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT = {
+    INTERACTIVE: float(os.getenv("SCHED_QUEUE_TIMEOUT_INTERACTIVE", "10")),
+    BATCH: float(os.getenv("SCHED_QUEUE_TIMEOUT_BATCH", "60")),
+}
+STAGE_CONCURRENCY = {
+    "stt": int(os.getenv("SCHED_STT_CONCURRENCY", "1")),
+    "embed": int(os.getenv("SCHED_EMBED_CONCURRENCY", "2")),
+    "sentiment": int(os.getenv("SCHED_SENTIMENT_CONCURRENCY", "8")),
+    "faiss": int(os.getenv("SCHED_FAISS_CONCURRENCY", "2")),
+}
+
+def start_deadline(budget: float | None):
+    """
+    Gives the current request, and every task it starts from here on, a deadline
+    `budget` seconds from now; stage work that cannot start before it is shed
+    """
+    if budget is not None:
+        current_deadline.set(time.monotonic() + budget)
+
+class Overloaded(Exception):
+    """
+    Raised when a stage sheds a request instead of queueing it
+    """
+    def __init__(self, stage: str, retry_after: float):
+        super().__init__(f"Stage '{stage}' is overloaded; retry after {retry_after:.1f}s.")
+        self.stage = stage
+        self.retry_after = retry_after
+
+class Stage:
+    """
+    Concurrency-limited stage with a priority queue ordered by (priority, deadline).
+    Work that cannot start before its deadline, or that finds the queue full, is
+    rejected up front rather than left to time out.
+    """
+    def __init__(self, name: str, concurrency: int, max_queue: int = SCHED_MAX_QUEUE):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiters = []
+        self.service_time = 1.0
+        self._seq = itertools.count()
+
+    def observe(self, seconds: float):
+        self.service_time = 0.8 * self.service_time + 0.2 * seconds
+
+    def estimated_wait(self, priority: int) -> float:
+        ahead = sum(1 for p, _, _, f in self.waiters if p <= priority and not f.done())
+        if self.active < self.concurrency and ahead == 0:
+            return 0.0
+        return (ahead // self.concurrency + 1) * self.service_time
+
+    def _prune(self):
+        # Waiters that timed out or were cancelled must not make the stage look busy
+        live = [w for w in self.waiters if not w[3].done()]
+        if len(live) != len(self.waiters):
+            heapq.heapify(live)
+            self.waiters = live
+
+    async def acquire(self, priority: int, deadline: float):
+        self._prune()
+        if self.active < self.concurrency and not self.waiters:
+            self.active += 1
+            return
+
+        wait = self.estimated_wait(priority)
+        if len(self.waiters) >= self.max_queue or time.monotonic() + wait > deadline:
+            raise Overloaded(self.name, max(wait, self.service_time))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, deadline, next(self._seq), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            # Granted a slot just as the timeout fired: hand it on
+            if self._granted(future):
+                self.release()
+            future.cancel()
+            raise Overloaded(self.name, self.estimated_wait(priority))
+        except asyncio.CancelledError:
+            # Granted a slot just as the caller went away: hand it on. A waiter that
+            # release() failed as expired never held a slot, so nothing is returned.
+            if self._granted(future):
+                self.release()
+            future.cancel()
+            raise
+
+    @staticmethod
+    def _granted(future: asyncio.Future) -> bool:
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def release(self):
+        self.active -= 1
+        now = time.monotonic()
+        while self.waiters and self.active < self.concurrency:
+            _, deadline, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+            if deadline <= now:
+                future.set_exception(Overloaded(self.name, self.service_time))
+                continue
+            self.active += 1
+            future.set_result(None)
+
+class Scheduler:
+    def __init__(self, concurrency: dict = STAGE_CONCURRENCY):
+        self.stages = {name: Stage(name, limit) for name, limit in concurrency.items()}
+
+    async def run(self, stage: str, fn, *args, priority: int = None, **kwargs):
+        """
+        Runs fn under the stage's limits. Sync functions run in the default executor,
+        coroutine functions are awaited. Raises Overloaded when shedding.
+        """
+        priority = current_priority.get() if priority is None else priority
+        deadline = time.monotonic() + QUEUE_TIMEOUT.get(priority, QUEUE_TIMEOUT[BATCH])
+        if (request_deadline := current_deadline.get()) is not None:
+            deadline = min(deadline, request_deadline)
+
+        target = self.stages[stage]
+        queued_at = time.monotonic()
+        await target.acquire(priority, deadline)
+        start = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(*args, **kwargs)
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            target.observe(elapsed)
+            target.release()
+            record_stage(stage, elapsed, queued=start - queued_at)
+
+scheduler = Scheduler()